@@ -31,11 +31,21 @@ Workflow:
     - Wasserstein distance normalized against the lifetime standard deviation of 
         each persistence diagram
 
+Live preview:
+Moving the Dimension or Lag sliders (or entering a value and pressing Return) re-embeds
+the already-loaded series and redraws a preview from an approximate persistence
+computation on a subsample. Recomputation is debounced until the parameters settle,
+after which the full-precision persistence is computed in a background process and the
+preview is refreshed with it. A change of parameters terminates that process.
+
 Dependencies:
+- pipeline.py: Runs the stages below as a graph, overlapping independent stages.
 - data_validator.py: Validates the data in the provided CSV files.
 - delay_embedder.py: Delay-embeds the time series to produce point clouds.
 - persistence_analyzer.py: Analyzes the point clouds using persistence homology 
     to produce persistence diagrams.
+- blocked_rips.py: Computes Rips persistence in float32 with blocked pairwise
+    distances, within a memory budget.
 - visualizer.py: Visualizes the point clouds and persistence diagrams, and 
     calculates the Wasserstein distance.
 - other python packages from the PSL or installable by pip, as detailed in 
@@ -56,19 +66,68 @@ Date:
 # Imports
 from tkinter import filedialog, messagebox
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
 from PIL import Image, ImageTk
 import numpy as np
 import csv
-import data_validator
+import multiprocessing
+import cost_estimator
 import delay_embedder
 import persistence_analyzer
-import visualizer
+import pipeline
+import preprocessor
+import queue
+import threading
 import tkinter as tk
 
+def compute_full_persistence(embedding1, embedding2, decision1, decision2, memory_budget):
+    """
+    Computes full-precision persistence diagrams and their Wasserstein distance.
+
+    Runs in a worker process, since ripser holds the GIL and would otherwise freeze the GUI.
+
+    Args:
+        embedding1 (numpy.ndarray): The first point cloud. Float32 clouds use the blocked float32 path.
+        embedding2 (numpy.ndarray): The second point cloud.
+        decision1 (cost_estimator.AdmissionDecision): Admission decision for the first cloud.
+        decision2 (cost_estimator.AdmissionDecision): Admission decision for the second cloud.
+        memory_budget (float): Peak memory allowed for the float32 distances, in bytes.
+
+    Returns:
+        tuple: The diagrams for each point cloud and the Wasserstein distance between them.
+    """
+    persistence_analysis = persistence_analyzer.PersistenceAnalysis(embedding1, embedding2)
+    diagrams1 = pipeline.compute_persistence(embedding1, decision1, memory_budget)
+    diagrams2 = pipeline.compute_persistence(embedding2, decision2, memory_budget)
+    wasserstein_dist = persistence_analysis.compute_wasserstein_distance(diagrams1, diagrams2)
+    return diagrams1, diagrams2, wasserstein_dist
+
+def send_full_persistence(connection, *args):
+    """
+    Runs compute_full_persistence in a worker process and sends its outcome to the GUI.
+
+    Args:
+        connection (multiprocessing.connection.Connection): Write end of the result pipe.
+        *args: The arguments of compute_full_persistence.
+    """
+    try:
+        connection.send(("done", compute_full_persistence(*args)))
+    except Exception as e:
+        connection.send(("error", str(e)))
+    finally:
+        connection.close()
+
 class TDAVisualizerApp:
     """
     Tkinter GUI for visualizing Topological Data Analysis (TDA) results.
     """
+    PREVIEW_DELAY_MS = 250    # Quiet period before the approximate preview recomputes
+    SETTLE_DELAY_MS = 1500    # Quiet period before the full-precision computation starts
+    POLL_INTERVAL_MS = 200    # How often to check for a finished full-precision result
+    PREVIEW_SAMPLES = 300     # Points per cloud passed to ripser for the preview
+    DEFAULT_MEMORY_BUDGET_MB = 2048
+    TIME_BUDGET_SECONDS = 600
+
     def __init__(self, root):
         """
         Initializes the TDAVisualizerApp.
@@ -78,12 +137,30 @@ class TDAVisualizerApp:
         """
         self.root = root
         self.root.title("Topological Data Analysis Visualizer")
-        self.root.geometry("800x600")  # Initial size of the window
+        self.root.geometry("800x850")  # Initial size of the window
 
         # File paths
         self.file1_path = ""
         self.file2_path = ""
 
+        # Live preview state: loaded series, pending after() jobs and the background worker,
+        # a process per full-precision run so that a stale run can be terminated
+        self.timeseries_cache = {}
+        self.preview_embeddings = None
+        self.preview_lengths = None
+        self.preview_parameters = None
+        self.preview_job = None
+        self.settle_job = None
+        self.full_process = None
+        self.full_connection = None
+        self.mp_context = multiprocessing.get_context("spawn")
+
+        # Progress events from the background analysis run, drained by poll_pipeline
+        self.pipeline_events = queue.Queue()
+
+        # Cost model used to admit, warn about or subsample persistence jobs
+        self.estimator = cost_estimator.CostEstimator.load_or_calibrate()
+
         # Labels and entry fields for file selection
         tk.Label(root, text="First Data File").grid(row=0, column=0, pady=2)
         self.file1_entry = tk.Entry(root, width=50)
@@ -95,27 +172,77 @@ class TDAVisualizerApp:
         self.file2_entry.grid(row=1, column=1, pady=2)
         tk.Button(root, text="Browse", command=self.browse_file2).grid(row=1, column=2, pady=2)
 
-        # Labels and entry fields for parameters
+        # Labels and entry fields for parameters. The entries hold the values used by both
+        # the preview and the analysis; pressing Return in one refreshes the preview
         tk.Label(root, text="Dimension").grid(row=2, column=0, pady=2)
         self.dimension_entry = tk.Entry(root)
+        self.dimension_entry.insert(0, "2")
+        self.dimension_entry.bind("<Return>", self.on_entry_change)
         self.dimension_entry.grid(row=2, column=1, pady=2)
 
         tk.Label(root, text="Lag").grid(row=3, column=0, pady=2)
         self.lag_entry = tk.Entry(root)
+        self.lag_entry.insert(0, "1")
+        self.lag_entry.bind("<Return>", self.on_entry_change)
         self.lag_entry.grid(row=3, column=1, pady=2)
 
+        # Sliders for the live preview; moving one copies its value into the entry field
+        self.dimension_scale = tk.Scale(root, from_=1, to=10, orient="horizontal",
+                                        command=lambda value: self.on_slider_change(self.dimension_entry, value))
+        self.dimension_scale.set(2)
+        self.dimension_scale.grid(row=2, column=2, pady=2)
+        self.lag_scale = tk.Scale(root, from_=1, to=100, orient="horizontal",
+                                  command=lambda value: self.on_slider_change(self.lag_entry, value))
+        self.lag_scale.set(1)
+        self.lag_scale.grid(row=3, column=2, pady=2)
+
+        # Options affecting how the analysis is run
+        self.options_frame = tk.Frame(root)
+        self.options_frame.grid(row=4, columnspan=3, pady=2)
+        tk.Label(self.options_frame, text="Memory budget (MB)").pack(side="left")
+        self.memory_budget_entry = tk.Entry(self.options_frame, width=8)
+        self.memory_budget_entry.insert(0, str(self.DEFAULT_MEMORY_BUDGET_MB))
+        self.memory_budget_entry.pack(side="left", padx=4)
+
+        # Preprocessing applied between loading and embedding; changes refresh the preview
+        tk.Label(self.options_frame, text="Detrend").pack(side="left")
+        self.detrend_var = tk.StringVar(value="none")
+        tk.OptionMenu(self.options_frame, self.detrend_var, "none", "constant", "linear",
+                      command=self.on_parameter_change).pack(side="left", padx=4)
+        tk.Label(self.options_frame, text="Target rate").pack(side="left")
+        self.target_rate_entry = tk.Entry(self.options_frame, width=8)
+        self.target_rate_entry.bind("<Return>", self.on_parameter_change)
+        self.target_rate_entry.pack(side="left", padx=4)
+        tk.Label(self.options_frame, text="Normalize").pack(side="left")
+        self.normalize_var = tk.StringVar(value="none")
+        tk.OptionMenu(self.options_frame, self.normalize_var, "none", "zscore", "minmax",
+                      command=self.on_parameter_change).pack(side="left", padx=4)
+
+        # Rips persistence of the embedding, or the much faster sublevel-set persistence of the signal
+        tk.Label(self.options_frame, text="Mode").pack(side="left")
+        self.mode_var = tk.StringVar(value="rips")
+        tk.OptionMenu(self.options_frame, self.mode_var, "rips", "sublevel",
+                      command=self.on_parameter_change).pack(side="left", padx=4)
+
+        # float32 computes Rips distances in blocks and cuts peak memory by about 40%
+        tk.Label(self.options_frame, text="Precision").pack(side="left")
+        self.precision_var = tk.StringVar(value="float64")
+        tk.OptionMenu(self.options_frame, self.precision_var, "float64", "float32",
+                      command=self.on_parameter_change).pack(side="left", padx=4)
+
         # Button to start processing
-        tk.Button(root, text="Run Analysis", command=self.run_analysis).grid(row=4, columnspan=3, pady=5)
+        self.run_button = tk.Button(root, text="Run Analysis", command=self.run_analysis)
+        self.run_button.grid(row=5, columnspan=3, pady=5)
 
         # Text box to show messages
         self.message_box = tk.Text(root, width=80, height=8)
-        self.message_box.grid(row=5, columnspan=3, pady=5)
+        self.message_box.grid(row=6, columnspan=3, pady=5)
 
         # Canvas and Scrollbar for displaying images
         self.canvas = tk.Canvas(root)
         self.scrollbar = tk.Scrollbar(root, orient="vertical", command=self.canvas.yview)
-        self.scrollbar.grid(row=6, column=3, sticky="ns")
-        self.canvas.grid(row=6, columnspan=3, pady=5, sticky="nsew")
+        self.scrollbar.grid(row=7, column=3, sticky="ns")
+        self.canvas.grid(row=7, columnspan=3, pady=5, sticky="nsew")
         self.canvas.configure(yscrollcommand=self.scrollbar.set)
 
         self.image_frame = tk.Frame(self.canvas)
@@ -123,13 +250,23 @@ class TDAVisualizerApp:
         # Ensure the canvas and image_frame expand properly
         self.canvas.create_window((0, 0), window=self.image_frame, anchor="nw")
         self.image_frame.bind("<Configure>", self.on_frame_configure)
-        self.canvas.grid(row=6, columnspan=3, pady=3, sticky="nsew")
+        self.canvas.grid(row=7, columnspan=3, pady=3, sticky="nsew")
         self.canvas.config(scrollregion=self.canvas.bbox("all"))
 
+        # Live preview figure, drawn in place rather than saved to disk
+        self.preview_status = tk.StringVar(value="Select both files to enable the live preview.")
+        tk.Label(root, textvariable=self.preview_status).grid(row=8, columnspan=3, pady=2)
+        self.preview_figure = Figure(figsize=(7, 2.5))
+        self.preview_canvas = FigureCanvasTkAgg(self.preview_figure, master=root)
+        self.preview_canvas.get_tk_widget().grid(row=9, columnspan=3, pady=2)
+
         # Make sure the row and column expand
-        self.root.grid_rowconfigure(6, weight=1)
+        self.root.grid_rowconfigure(7, weight=1)
         self.root.grid_columnconfigure(1, weight=1)
 
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(self.POLL_INTERVAL_MS, self.poll_full_persistence)
+
     def on_frame_configure(self, event):
         """
         Updates the scroll region of the canvas when the image frame is resized.
@@ -147,6 +284,7 @@ class TDAVisualizerApp:
         self.file1_path = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv")])
         self.file1_entry.delete(0, tk.END)
         self.file1_entry.insert(0, self.file1_path)
+        self.on_parameter_change()
 
     def browse_file2(self):
         """
@@ -155,97 +293,359 @@ class TDAVisualizerApp:
         self.file2_path = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv")])
         self.file2_entry.delete(0, tk.END)
         self.file2_entry.insert(0, self.file2_path)
+        self.on_parameter_change()
 
-    def run_analysis(self):
+    def on_slider_change(self, entry, value):
         """
-        Runs the TDA analysis based on the selected files and parameters.
+        Copies a slider's value into its entry field and (re)schedules the live preview.
+
+        Args:
+            entry (tkinter.Entry): The entry field the slider controls.
+            value (str): The new slider value passed by tkinter.
+        """
+        if entry.get() != value:
+            entry.delete(0, tk.END)
+            entry.insert(0, value)
+        self.on_parameter_change()
+
+    def on_entry_change(self, event=None):
+        """
+        Moves the sliders to the entered values where they are in range, and (re)schedules
+        the live preview. Values beyond a slider's range are previewed from the entry.
+
+        Args:
+            event (tkinter.Event, optional): The key event passed by tkinter (unused).
         """
-        dimension = self.dimension_entry.get()
-        lag = self.lag_entry.get()
+        parameters = self.get_embedding_parameters(show_errors=False)
+        if parameters is not None:
+            for scale, parameter in zip((self.dimension_scale, self.lag_scale), parameters):
+                if float(scale.cget("from")) <= parameter <= float(scale.cget("to")):
+                    scale.set(parameter)
+        self.on_parameter_change()
+
+    def on_parameter_change(self, value=None):
+        """
+        (Re)schedules the live preview.
+
+        Any pending preview job is cancelled and a running full-precision computation is
+        terminated, so recomputation only happens once the input has been quiet for
+        PREVIEW_DELAY_MS.
+
+        Args:
+            value (str, optional): The new option value passed by tkinter (unused).
+        """
+        for job in (self.preview_job, self.settle_job):
+            if job is not None:
+                self.root.after_cancel(job)
+        self.settle_job = None
+        self.stop_full_persistence()
+        self.preview_job = self.root.after(self.PREVIEW_DELAY_MS, self.update_preview)
+
+    def get_embedding_parameters(self, show_errors=True):
+        """
+        Reads the dimension and lag entry fields.
+
+        Args:
+            show_errors (bool): Whether to report invalid values in a dialog.
 
+        Returns:
+            tuple: The dimension and lag, or None if either is not a positive integer.
+        """
         try:
-            dimension = int(dimension)
-            lag = int(lag)
+            dimension = int(self.dimension_entry.get())
+            lag = int(self.lag_entry.get())
             if dimension <= 0 or lag <= 0:
                 raise ValueError
         except ValueError:
-            messagebox.showerror("Invalid Input", "Both dimension and lag must be positive integers.")
-            return
+            if show_errors:
+                messagebox.showerror("Invalid Input", "Both dimension and lag must be positive integers.")
+            return None
+        return dimension, lag
 
-        if not self.file1_path or not self.file2_path:
-            messagebox.showerror("File Error", "Both data files must be selected.")
-            return
+    def load_timeseries(self, file_path, preprocessing):
+        """
+        Returns the preprocessed signal of a CSV file, reading each file only once.
 
-        self.message_box.insert(tk.END, "Validating files...\n")
-        self.message_box.update()
+        The raw columns are cached, so changing the preprocessing options only reruns
+        the (vectorized) preprocessing, not the file parsing.
 
-        validator = data_validator.Validation(self.file1_path, self.file2_path)
-        validation_result = validator.validate_files()
-        if validation_result != "Both files are successfully validated.":
-            self.message_box.insert(tk.END, f"{validation_result}\n")
-            return
+        Args:
+            file_path (str): The path to the CSV file.
+            preprocessing (preprocessor.Preprocessing): The preprocessing stage to apply.
 
-        self.message_box.insert(tk.END, "Converting files to arrays...\n")
-        self.message_box.update()
+        Returns:
+            numpy.ndarray: The preprocessed signal, or None if the file could not be read.
+        """
+        if file_path not in self.timeseries_cache:
+            columns = self.read_csv_columns(file_path)
+            if columns is None:
+                return None
+            self.timeseries_cache[file_path] = columns
+        timesteps, timeseries = self.timeseries_cache[file_path]
+        return preprocessing.process(timesteps, timeseries)[1]
+
+    def update_preview(self):
+        """
+        Re-embeds the loaded series and redraws the preview from approximate persistence.
+        """
+        self.preview_job = None
+        if not self.file1_path or not self.file2_path:
+            return
 
-        timeseries1 = self.read_csv_column(self.file1_path)
-        timeseries2 = self.read_csv_column(self.file2_path)
+        preprocessing = self.get_preprocessing(show_errors=False)
+        if preprocessing is None:
+            self.preview_status.set("Preview unavailable: the preprocessing options are invalid.")
+            return
 
+        timeseries1 = self.load_timeseries(self.file1_path, preprocessing)
+        timeseries2 = self.load_timeseries(self.file2_path, preprocessing)
         if timeseries1 is None or timeseries2 is None:
             return
 
-#        self.message_box.insert(tk.END, f"Timeseries1 Length: {len(timeseries1)}\n")
-#        self.message_box.insert(tk.END, f"Timeseries2 Length: {len(timeseries2)}\n")
-#        self.message_box.update()
+        parameters = self.get_embedding_parameters(show_errors=False)
+        if parameters is None:
+            self.preview_status.set("Preview unavailable: dimension and lag must be positive integers.")
+            return
+        dimension, lag = parameters
+        try:
+            embedding1 = delay_embedder.DelayEmbedding(timeseries1, dimension, lag).generate_strided_embedding()
+            embedding2 = delay_embedder.DelayEmbedding(timeseries2, dimension, lag).generate_strided_embedding()
+        except ValueError as e:
+            self.preview_status.set(f"Preview unavailable: {e}")
+            return
 
-        self.message_box.insert(tk.END, "Performing delay embedding...\n")
-        self.message_box.update()
+        persistence_analysis = persistence_analyzer.PersistenceAnalysis(embedding1, embedding2)
+        if self.mode_var.get() == "sublevel":
+            # Sublevel-set persistence is cheap enough to compute exactly on every change
+            diagrams1 = persistence_analysis.generate_sublevel_persistence(timeseries1)
+            diagrams2 = persistence_analysis.generate_sublevel_persistence(timeseries2)
+            wasserstein_dist = persistence_analysis.compute_wasserstein_distance(diagrams1, diagrams2)
+            self.draw_preview(embedding1, embedding2, diagrams1, diagrams2)
+            self.preview_status.set(f"Sublevel-set persistence (exact): Wasserstein distance {wasserstein_dist:.4f}")
+            return
 
-        embedding1 = delay_embedder.DelayEmbedding(timeseries1, dimension, lag).generate_embedding()
-        embedding2 = delay_embedder.DelayEmbedding(timeseries2, dimension, lag).generate_embedding()
+        diagrams1 = persistence_analysis.generate_approximate_persistence_homology(embedding1, self.PREVIEW_SAMPLES)
+        diagrams2 = persistence_analysis.generate_approximate_persistence_homology(embedding2, self.PREVIEW_SAMPLES)
+        wasserstein_dist = persistence_analysis.compute_wasserstein_distance(diagrams1, diagrams2)
 
-#        self.message_box.insert(tk.END, f"Embedding1 Shape: {embedding1.shape}\n")
-#        self.message_box.insert(tk.END, f"Embedding2 Shape: {embedding2.shape}\n")
-#        self.message_box.update()
+        self.preview_embeddings = (embedding1, embedding2)
+        self.preview_lengths = (len(timeseries1), len(timeseries2))
+        self.preview_parameters = parameters
+        self.draw_preview(embedding1, embedding2, diagrams1, diagrams2)
+        self.preview_status.set(f"Preview (dimension {dimension}, lag {lag}, approximate on {self.PREVIEW_SAMPLES} points): "
+                                f"Wasserstein distance {wasserstein_dist:.4f}. Computing full precision once parameters settle...")
+        self.settle_job = self.root.after(self.SETTLE_DELAY_MS, self.start_full_persistence)
 
-        self.message_box.insert(tk.END, "Performing persistence analysis...this could take a minute...\n")
-        self.message_box.update()
+    def start_full_persistence(self):
+        """
+        Starts the full-precision persistence computation for the settled parameters.
+        """
+        self.settle_job = None
+        embedding1, embedding2 = self.preview_embeddings
+        dimension, lag = self.preview_parameters
+        memory_budget = self.get_memory_budget()
+        if memory_budget is None:
+            return
 
-        persistence_analysis = persistence_analyzer.PersistenceAnalysis(embedding1, embedding2)
-        persistence_analysis.diagrams1 = persistence_analysis.generate_persistence_homology(embedding1)
-        persistence_analysis.diagrams2 = persistence_analysis.generate_persistence_homology(embedding2)
+        precision = self.precision_var.get()
+        decisions = []
+        for n_samples_series in self.preview_lengths:
+            decision = self.estimator.admit(n_samples_series, dimension, lag,
+                                            memory_budget=memory_budget, time_budget=self.TIME_BUDGET_SECONDS,
+                                            precision=precision)
+            if decision.action == 'reject':
+                self.preview_status.set(f"Full precision skipped: {decision.message}")
+                return
+            decisions.append(decision)
+
+        self.full_connection, sender = self.mp_context.Pipe(duplex=False)
+        self.full_process = self.mp_context.Process(target=send_full_persistence, daemon=True,
+                                                    args=(sender, embedding1.astype(precision, copy=False),
+                                                          embedding2.astype(precision, copy=False),
+                                                          *decisions, memory_budget))
+        self.full_process.start()
+        sender.close()
+
+    def stop_full_persistence(self):
+        """
+        Terminates the full-precision computation, if one is running, and discards its result.
+        """
+        if self.full_process is not None:
+            self.full_process.terminate()
+            self.full_process.join()
+            self.full_connection.close()
+            self.full_process = None
+            self.full_connection = None
+
+    def poll_full_persistence(self):
+        """
+        Shows the full-precision result once the background computation finishes.
+        """
+        if self.full_connection is not None and self.full_connection.poll():
+            try:
+                outcome, payload = self.full_connection.recv()
+            except EOFError:
+                outcome, payload = "error", f"the worker process exited with code {self.full_process.exitcode}"
+            self.stop_full_persistence()
+            if outcome == "error":
+                self.preview_status.set(f"Full-precision computation failed: {payload}")
+            else:
+                diagrams1, diagrams2, wasserstein_dist = payload
+                embedding1, embedding2 = self.preview_embeddings
+                dimension, lag = self.preview_parameters
+                self.draw_preview(embedding1, embedding2, diagrams1, diagrams2)
+                self.preview_status.set(f"Full precision (dimension {dimension}, lag {lag}): "
+                                        f"Wasserstein distance {wasserstein_dist:.4f}")
+        self.root.after(self.POLL_INTERVAL_MS, self.poll_full_persistence)
+
+    def draw_preview(self, embedding1, embedding2, diagrams1, diagrams2):
+        """
+        Draws the point clouds and persistence diagrams of both series into the preview figure.
 
-        wasserstein_dist = persistence_analysis.compute_wasserstein_distance(persistence_analysis.diagrams1, persistence_analysis.diagrams2)
-        std_lifetimes1 = persistence_analysis.compute_std_lifetimes(persistence_analysis.diagrams1)
-        std_lifetimes2 = persistence_analysis.compute_std_lifetimes(persistence_analysis.diagrams2)
+        Args:
+            embedding1 (numpy.ndarray): The first point cloud.
+            embedding2 (numpy.ndarray): The second point cloud.
+            diagrams1 (list): Persistence diagrams for the first point cloud.
+            diagrams2 (list): Persistence diagrams for the second point cloud.
+        """
+        self.preview_figure.clear()
+        cloud_ax, diagram_ax = self.preview_figure.subplots(1, 2)
+        for embedding, color, label in ((embedding1, 'b', 'TS1'), (embedding2, 'g', 'TS2')):
+            y = embedding[:, 1] if embedding.shape[1] > 1 else embedding[:, 0]
+            cloud_ax.scatter(embedding[:, 0], y, s=2, c=color, label=label)
+        cloud_ax.set_title("Point Clouds", fontsize=9)
+        cloud_ax.legend(fontsize=7)
+
+        # Show H1 when it was computed (Rips mode), otherwise the finite part of H0 (sublevel mode)
+        dim = 1 if len(diagrams1) > 1 else 0
+        for diagrams, color, label in ((diagrams1, 'b', 'TS1'), (diagrams2, 'g', 'TS2')):
+            if dim < len(diagrams):
+                finite = diagrams[dim][np.isfinite(diagrams[dim][:, 1])]
+                diagram_ax.scatter(finite[:, 0], finite[:, 1], s=6, c=color, label=label)
+        diagram_ax.set_title(f"H{dim} Persistence", fontsize=9)
+        diagram_ax.set_xlabel("Birth", fontsize=8)
+        diagram_ax.set_ylabel("Death", fontsize=8)
+        self.preview_figure.tight_layout()
+        self.preview_canvas.draw_idle()
+
+    def on_close(self):
+        """
+        Terminates the background worker and closes the window.
+        """
+        self.stop_full_persistence()
+        self.root.destroy()
 
-        self.message_box.insert(tk.END, f"Wasserstein Distance: {wasserstein_dist}\n")
-#        self.message_box.insert(tk.END, f"Standard Deviation of Lifetimes (File 1): {std_lifetimes1}\n")
-#        self.message_box.insert(tk.END, f"Standard Deviation of Lifetimes (File 2): {std_lifetimes2}\n")
-        self.message_box.update()
+    def run_analysis(self):
+        """
+        Runs the TDA analysis based on the selected files and parameters.
+        """
+        parameters = self.get_embedding_parameters()
+        if parameters is None:
+            return
+        dimension, lag = parameters
+
+        if not self.file1_path or not self.file2_path:
+            messagebox.showerror("File Error", "Both data files must be selected.")
+            return
 
-        if std_lifetimes1 is None or std_lifetimes2 is None:
-            messagebox.showerror("Analysis Error", "Failed to compute standard deviation of lifetimes for the persistence diagrams.")
+        preprocessing = self.get_preprocessing()
+        if preprocessing is None:
             return
 
-        self.message_box.insert(tk.END, "Generating visualizations...\n")
-        self.message_box.update()
+        memory_budget = self.get_memory_budget()
+        if memory_budget is None:
+            return
 
+        # The stage graph runs in a background thread (its persistence stages in worker
+        # processes); progress reaches the GUI through a queue drained by poll_pipeline
         self.clear_image_frame()
-        visualization = visualizer.Visualization()
-        visualization.plot_point_cloud(embedding1)
-        visualization.plot_point_cloud(embedding2)
-        visualization.plot_persistence_homology(persistence_analysis.diagrams1)
-        visualization.plot_persistence_homology(persistence_analysis.diagrams2)
-        visualization.plot_normalized_wasserstein(wasserstein_dist, std_lifetimes1, std_lifetimes2)
+        graph = pipeline.build_analysis_graph(self.file1_path, self.file2_path, dimension, lag, preprocessing,
+                                              mode=self.mode_var.get(), estimator=self.estimator,
+                                              memory_budget=memory_budget, time_budget=self.TIME_BUDGET_SECONDS,
+                                              mp_context=multiprocessing.get_context("spawn"),
+                                              precision=self.precision_var.get())
+        self.run_button.config(state="disabled")
+        threading.Thread(target=self.run_pipeline, args=(graph,), daemon=True).start()
+        self.root.after(self.POLL_INTERVAL_MS, self.poll_pipeline)
+
+    def run_pipeline(self, graph):
+        """
+        Runs the analysis stage graph and queues its progress and outcome. Called on a worker thread.
+
+        Args:
+            graph (pipeline.StageGraph): The analysis graph to run.
+        """
+        try:
+            results = graph.run(report=lambda message: self.pipeline_events.put(("message", message)))
+        except pipeline.PipelineAbort as e:
+            self.pipeline_events.put(("error", str(e)))
+        except Exception as e:
+            self.pipeline_events.put(("error", f"An error occurred during the analysis: {e}"))
+        else:
+            self.pipeline_events.put(("message", f"Wasserstein Distance: {results['compare']['wasserstein_dist']}"))
+            self.pipeline_events.put(("done", [results[name] for name in pipeline.PLOT_STAGES if results[name] is not None]))
+
+    def poll_pipeline(self):
+        """
+        Shows queued pipeline progress in the message box, and the plots once the analysis completes.
+        """
+        while not self.pipeline_events.empty():
+            kind, payload = self.pipeline_events.get()
+            if kind == "message":
+                self.message_box.insert(tk.END, f"{payload}\n")
+                self.message_box.see(tk.END)
+            elif kind == "error":
+                self.run_button.config(state="normal")
+                messagebox.showerror("Analysis Error", payload)
+                return
+            else:
+                self.run_button.config(state="normal")
+                for plot_file in payload:
+                    self.display_image(plot_file)
+                self.message_box.insert(tk.END, "Analysis complete! These plots are also saved to source directory.\n")
+                return
+        self.root.after(self.POLL_INTERVAL_MS, self.poll_pipeline)
+
+    def get_memory_budget(self):
+        """
+        Reads the memory budget entry field.
+
+        Returns:
+            float: The memory budget in bytes, or None if the entry is not a positive number.
+        """
+        try:
+            memory_budget_mb = float(self.memory_budget_entry.get())
+            if memory_budget_mb <= 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Invalid Input", "The memory budget must be a positive number of megabytes.")
+            return None
+        return memory_budget_mb * 2**20
 
-        self.display_image('point_cloud_0.png')
-        self.display_image('point_cloud_1.png')
-        self.display_image('persistence_diagram_combined_0.png')
-        self.display_image('persistence_diagram_combined_1.png')
-        self.display_image('normalized_wasserstein.png')
+    def get_preprocessing(self, show_errors=True):
+        """
+        Builds the preprocessing stage from the option widgets.
+
+        Args:
+            show_errors (bool): Whether to report an invalid target rate in a dialog.
 
-        self.message_box.insert(tk.END, "Analysis complete! These plots are also saved to source directory.\n")
+        Returns:
+            preprocessor.Preprocessing: The configured stage, or None if the target rate is invalid.
+        """
+        target_rate = self.target_rate_entry.get().strip()
+        try:
+            target_rate = float(target_rate) if target_rate else None
+            if target_rate is not None and target_rate <= 0:
+                raise ValueError
+        except ValueError:
+            if show_errors:
+                messagebox.showerror("Invalid Input", "The target rate must be blank or a positive number of samples per time unit.")
+            return None
+        detrend = self.detrend_var.get()
+        normalize = self.normalize_var.get()
+        return preprocessor.Preprocessing(detrend=None if detrend == "none" else detrend,
+                                          target_rate=target_rate,
+                                          normalize=None if normalize == "none" else normalize)
 
     def display_image(self, img_path):
         """
@@ -282,24 +682,25 @@ class TDAVisualizerApp:
             widget.destroy()
         self.canvas.config(scrollregion=self.canvas.bbox("all"))
 
-    def read_csv_column(self, file_path):
+    def read_csv_columns(self, file_path):
         """
-        Reads the second column of a CSV file and returns it as a NumPy array.
+        Reads the timestep and signal columns of a CSV file and returns them as NumPy arrays.
         
         Args:
             file_path (str): The path to the CSV file.
         
         Returns:
-            numpy.ndarray: The second column of the CSV file as a NumPy array, or None if an error occurs.
+            tuple: The first (timestep) and second (signal) columns as NumPy arrays, or None if an error occurs.
         """
         try:
-            second_column = []
+            rows = []
             with open(file_path, 'r') as file:
                 reader = csv.reader(file)
                 next(reader)
                 for row in reader:
-                    second_column.append(row[1])
-            return np.array(second_column, dtype=float)
+                    rows.append(row[:2])
+            timesteps, signal = np.array(rows, dtype=float).T
+            return timesteps, signal
         except Exception as e:
             messagebox.showerror("File Error", f"An error occurred while reading the file: {e}")
             return None
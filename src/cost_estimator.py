@@ -0,0 +1,340 @@
+from collections import namedtuple
+from ripser import ripser
+import numpy as np
+import blocked_rips
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Cost model and admission control for ripser runs on delay-embedded time series
+# Example usage:
+#     estimator = CostEstimator.load_or_calibrate()
+#     decision = estimator.admit(n_samples=25000, dimension=3, lag=15, memory_budget=2048 * 2**20)
+#     print(decision.message)
+
+CALIBRATION_PATH = os.path.join(os.path.expanduser("~"), ".tda_visualizer_calibration.json")
+# Bumped whenever the benchmark changes, so that stale calibration files are redone
+CALIBRATION_VERSION = 2
+
+# Run in a fresh interpreter that imports nothing else, so that no freed heap is around
+# for ripser to reuse unseen: prints how far ripser raises the peak resident set size
+# of the process, in kilobytes, for the cloud read from stdin as .npy. On Linux
+# ru_maxrss also keeps the parent's peak, inherited through fork and exec, so the
+# peak of the process image (VmHWM) is read instead where it is available.
+PEAK_RSS_SCRIPT = """
+import io, sys
+import numpy as np
+from ripser import ripser
+
+def peak_kilobytes():
+    try:
+        with open("/proc/self/status") as status:
+            return next(int(line.split()[1]) for line in status if line.startswith("VmHWM:"))
+    except (OSError, StopIteration):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 if sys.platform == "darwin" else peak
+
+cloud = np.load(io.BytesIO(sys.stdin.buffer.read()))
+before = peak_kilobytes()
+ripser(cloud, maxdim=int(sys.argv[1]))
+print(peak_kilobytes() - before)
+"""
+
+CostEstimate = namedtuple("CostEstimate", ["n_points", "seconds", "peak_bytes"])
+AdmissionDecision = namedtuple("AdmissionDecision", ["action", "estimate", "n_samples", "message"])
+
+
+class CostEstimator:
+    """
+    A class to predict ripser run time and peak memory, and to decide whether a job should run.
+
+    Run time is modelled as seconds = time_coefficient * n_points ** time_exponent per homology
+    degree, fitted by a short benchmark on the host. Peak memory is dominated by the dense
+    distance matrix and the index grids ripser builds from it, so it is modelled as
+    bytes_per_pair * n_points ** 2, with bytes_per_pair measured by the benchmark as the
+    growth of the peak resident set size of a child process running ripser.
+    The float32 path of blocked_rips.py has its own, smaller memory model, and can always
+    be fitted into a memory budget by dropping long edges, so for it only the time budget
+    triggers subsampling.
+
+    Attributes:
+        time_models (dict): Maps a homology degree (maxdim) to a (coefficient, exponent) pair.
+        bytes_per_pair (float): Peak bytes allocated per pair of points.
+    """
+
+    # Rough figures for a modern laptop, used until the host has been benchmarked
+    # (peak RSS of ripser 0.6 with maxdim=1 grows by 63-70 bytes per n**2 up to n=6000)
+    DEFAULT_TIME_MODELS = {0: (1e-7, 2.1), 1: (1e-7, 2.3), 2: (1e-7, 3.0)}
+    DEFAULT_BYTES_PER_PAIR = 70.0
+
+    # Admission thresholds
+    WARN_SECONDS = 60.0
+    MIN_SUBSAMPLE = 100
+
+    def __init__(self, time_models=None, bytes_per_pair=None):
+        """
+        Initialize the CostEstimator class with model coefficients.
+
+        Args:
+            time_models (dict, optional): Maps maxdim to a (coefficient, exponent) pair.
+            bytes_per_pair (float, optional): Peak bytes allocated per pair of points.
+        """
+        self.time_models = dict(self.DEFAULT_TIME_MODELS)
+        if time_models:
+            self.time_models.update(time_models)
+        self.bytes_per_pair = self.DEFAULT_BYTES_PER_PAIR if bytes_per_pair is None else bytes_per_pair
+
+    @classmethod
+    def load_or_calibrate(cls, path=CALIBRATION_PATH):
+        """
+        Load a saved calibration for this host, benchmarking and saving one if none exists.
+
+        Args:
+            path (str): Location of the calibration file.
+
+        Returns:
+            CostEstimator: A calibrated estimator.
+        """
+        try:
+            with open(path, 'r') as file:
+                saved = json.load(file)
+            if saved.get("version") != CALIBRATION_VERSION:
+                raise KeyError("version")
+            time_models = {int(maxdim): tuple(model) for maxdim, model in saved["time_models"].items()}
+            return cls(time_models, saved["bytes_per_pair"])
+        except (OSError, ValueError, KeyError):
+            estimator = cls()
+            estimator.calibrate()
+            try:
+                estimator.save(path)
+            except OSError:
+                pass
+            return estimator
+
+    def save(self, path=CALIBRATION_PATH):
+        """
+        Save the model coefficients as JSON.
+
+        Args:
+            path (str): Location of the calibration file.
+        """
+        with open(path, 'w') as file:
+            json.dump({"version": CALIBRATION_VERSION,
+                       "time_models": {str(k): list(v) for k, v in self.time_models.items()},
+                       "bytes_per_pair": self.bytes_per_pair}, file)
+
+    def calibrate(self, sizes=(150, 300, 600), maxdims=(0, 1), dimension=3, memory_sizes=(600, 1200), memory_maxdim=1):
+        """
+        Benchmark ripser on the host and refit the time and memory models.
+
+        The benchmark clouds are delay embeddings of a noisy sine wave, which behave
+        much more like real inputs than uniform random points. Memory is measured as
+        the growth of the peak resident set size of a fresh child process per size,
+        which unlike tracemalloc includes ripser's C++ buffers, and bytes_per_pair is
+        the slope between two sizes, so fixed per-run overheads cancel out.
+        Where the resource module is unavailable (Windows) the default is kept.
+
+        Args:
+            sizes (tuple): Point counts to benchmark for time (at least two).
+            maxdims (tuple): Homology degrees to fit time models for.
+            dimension (int): Embedding dimension of the benchmark clouds.
+            memory_sizes (tuple): The two point counts to benchmark for memory.
+            memory_maxdim (int): Homology degree of the memory benchmark; the drivers compute up to 1.
+        """
+        for maxdim in maxdims:
+            seconds = []
+            for n in sizes:
+                cloud = benchmark_cloud(n, dimension)
+                start = time.perf_counter()
+                ripser(cloud, maxdim=maxdim)
+                seconds.append(max(time.perf_counter() - start, 1e-6))
+            exponent, log_coefficient = np.polyfit(np.log(sizes), np.log(seconds), 1)
+            self.time_models[maxdim] = (float(np.exp(log_coefficient)), float(exponent))
+
+        if resource is None:
+            return
+        # A fresh process per size, since the peak resident set size only ever grows
+        peaks = [peak_rss_growth(benchmark_cloud(n, dimension), memory_maxdim) for n in memory_sizes]
+        small, large = memory_sizes
+        self.bytes_per_pair = max((peaks[1] - peaks[0]) / (large ** 2 - small ** 2), 1.0)
+
+    def estimate(self, n_samples, dimension, lag, maxdim=1, precision='float64'):
+        """
+        Predict the ripser run time and peak memory for one delay-embedded series.
+
+        Args:
+            n_samples (int): Number of samples in the time series.
+            dimension (int): The embedding dimension.
+            lag (int): The lag parameter for embedding.
+            maxdim (int): Maximum homology degree computed.
+            precision (str): 'float64' for ripser on raw points, 'float32' for blocked_rips.py.
+
+        Returns:
+            CostEstimate: The number of embedded points, predicted seconds and predicted peak bytes.
+        """
+        n_points = max(n_samples - (dimension - 1) * lag, 0)
+        if precision == 'float32':
+            peak_bytes = blocked_rips.dense_peak_bytes(n_points, dimension)
+        else:
+            peak_bytes = self._peak_bytes(n_points, dimension)
+        return CostEstimate(n_points, self._seconds(n_points, maxdim), peak_bytes)
+
+    def admit(self, n_samples, dimension, lag, maxdim=1, memory_budget=2 * 2**30, time_budget=600.0, precision='float64'):
+        """
+        Decide whether a persistence job should run as requested, with a warning, or subsampled.
+
+        Args:
+            n_samples (int): Number of samples in the time series.
+            dimension (int): The embedding dimension.
+            lag (int): The lag parameter for embedding.
+            maxdim (int): Maximum homology degree computed.
+            memory_budget (float): Peak memory allowed, in bytes.
+            time_budget (float): Run time allowed, in seconds.
+            precision (str): 'float64' or 'float32' (see estimate).
+
+        Returns:
+            AdmissionDecision: action is one of 'run', 'warn', 'subsample' or 'reject'; n_samples
+                is the number of points to pass to ripser (None unless subsampling).
+        """
+        estimate = self.estimate(n_samples, dimension, lag, maxdim, precision)
+        summary = (f"{estimate.n_points} points, estimated {format_seconds(estimate.seconds)} "
+                   f"and {format_bytes(estimate.peak_bytes)} peak memory")
+        # The float32 path fits any memory budget by dropping long edges, so only time limits it
+        truncation = ""
+        if precision == 'float32':
+            if estimate.peak_bytes > memory_budget:
+                truncation = " Long edges will be dropped to fit the memory budget."
+            memory_budget = np.inf
+
+        if estimate.n_points == 0:
+            return AdmissionDecision('reject', estimate, None,
+                                     f"The series is too short for dimension {dimension} and lag {lag}.")
+
+        if estimate.peak_bytes <= memory_budget and estimate.seconds <= time_budget:
+            if estimate.seconds <= self.WARN_SECONDS:
+                return AdmissionDecision('run', estimate, None, f"{summary}.{truncation}")
+            return AdmissionDecision('warn', estimate, None, f"{summary}. This may take a while.{truncation}")
+
+        n_allowed = self.max_points(dimension, maxdim, memory_budget, time_budget)
+        if n_allowed < self.MIN_SUBSAMPLE:
+            return AdmissionDecision('reject', estimate, None,
+                                     f"{summary}, which exceeds the budget even when subsampled.")
+        subsampled = self.estimate(n_allowed + (dimension - 1) * lag, dimension, lag, maxdim, precision)
+        budget = format_seconds(time_budget) if np.isinf(memory_budget) else f"{format_bytes(memory_budget)} and {format_seconds(time_budget)}"
+        return AdmissionDecision('subsample', estimate, n_allowed,
+                                 f"{summary}, which exceeds the budget of {budget}. Subsampling to {n_allowed} points "
+                                 f"(estimated {format_seconds(subsampled.seconds)} and "
+                                 f"{format_bytes(subsampled.peak_bytes)}).{truncation}")
+
+    def max_points(self, dimension, maxdim, memory_budget, time_budget):
+        """
+        Compute the largest point cloud that fits both budgets.
+
+        Args:
+            dimension (int): The embedding dimension.
+            maxdim (int): Maximum homology degree computed.
+            memory_budget (float): Peak memory allowed, in bytes.
+            time_budget (float): Run time allowed, in seconds.
+
+        Returns:
+            int: The largest admissible number of points.
+        """
+        coefficient, exponent = self._time_model(maxdim)
+        by_time = (time_budget / coefficient) ** (1.0 / exponent)
+        # Solve bytes_per_pair * n**2 + 8 * dimension * n = memory_budget for n
+        a, b = self.bytes_per_pair, 8.0 * dimension
+        by_memory = (-b + np.sqrt(b * b + 4 * a * memory_budget)) / (2 * a)
+        return int(min(by_time, by_memory))
+
+    def _time_model(self, maxdim):
+        if maxdim in self.time_models:
+            return self.time_models[maxdim]
+        # Each extra homology degree roughly adds one to the exponent
+        known = max(self.time_models)
+        coefficient, exponent = self.time_models[known]
+        return coefficient, exponent + (maxdim - known)
+
+    def _seconds(self, n_points, maxdim):
+        coefficient, exponent = self._time_model(maxdim)
+        return coefficient * n_points ** exponent if n_points > 0 else 0.0
+
+    def _peak_bytes(self, n_points, dimension):
+        return self.bytes_per_pair * n_points ** 2 + 8.0 * dimension * n_points
+
+
+def benchmark_cloud(n_points, dimension):
+    """
+    Build the benchmark point cloud: a delay embedding of a noisy sine wave.
+
+    Args:
+        n_points (int): Number of points.
+        dimension (int): The embedding dimension.
+
+    Returns:
+        np.ndarray: The (n_points, dimension) point cloud.
+    """
+    rng = np.random.default_rng(n_points)
+    t = np.linspace(0, 20 * np.pi, n_points + dimension)
+    signal = np.sin(t) + 0.1 * rng.standard_normal(len(t))
+    return np.lib.stride_tricks.sliding_window_view(signal, dimension)[:n_points]
+
+
+def peak_rss_growth(point_cloud, maxdim):
+    """
+    Measure how far ripser raises the peak resident set size of a fresh process.
+
+    Args:
+        point_cloud (np.ndarray): The points.
+        maxdim (int): Maximum homology degree computed.
+
+    Returns:
+        float: The growth in bytes.
+    """
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(point_cloud))
+    result = subprocess.run([sys.executable, "-c", PEAK_RSS_SCRIPT, str(maxdim)], input=buffer.getvalue(),
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True)
+    return float(result.stdout.split()[-1]) * 1024
+
+
+def format_seconds(seconds):
+    """
+    Format a duration for display.
+
+    Args:
+        seconds (float): The duration in seconds.
+
+    Returns:
+        str: The duration with a sensible unit.
+    """
+    if seconds < 60:
+        return f"{seconds:.1f} s"
+    if seconds < 3600:
+        return f"{seconds / 60:.1f} min"
+    return f"{seconds / 3600:.1f} h"
+
+
+def format_bytes(n_bytes):
+    """
+    Format a memory size for display.
+
+    Args:
+        n_bytes (float): The size in bytes.
+
+    Returns:
+        str: The size with a sensible unit.
+    """
+    for unit in ("B", "KB", "MB", "GB"):
+        if n_bytes < 1024:
+            return f"{n_bytes:.0f} {unit}"
+        n_bytes /= 1024
+    return f"{n_bytes:.1f} TB"
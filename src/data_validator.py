@@ -3,9 +3,11 @@ import pandas as pd
 # Validation that user-supplied data files are properly formatted for processing
 # Example usage:
 #     validator = Validation('DataFile1.csv', 'DataFile2.csv', 10, 100)
+# There is no upper row limit by default: cost_estimator.CostEstimator decides whether a
+# series is affordable for the chosen dimension, lag and memory budget.
 
 class Validation:
-    def __init__(self, file1_path, file2_path, min_rows=100, max_rows=10000):
+    def __init__(self, file1_path, file2_path, min_rows=100, max_rows=None):
         self.file1_path = file1_path
         self.file2_path = file2_path
         self.min_rows = min_rows
@@ -30,6 +32,19 @@ class Validation:
 
         return "Both files are successfully validated."
 
+    # Validation of a single file, returning its data so callers need not read it again
+    def validate_file(self, file_path):
+        try:
+            data = pd.read_csv(file_path)
+        except Exception as e:
+            return None, f"Error reading file: {e}"
+
+        valid, msg = self.validate_data(data)
+        if not valid:
+            return None, msg
+
+        return data, msg
+
     # Performs 5 checks to data to ensure they can be processed
     def validate_data(self, data):
         if len(data.columns) != 2:
@@ -38,7 +53,10 @@ class Validation:
         if not all(pd.api.types.is_numeric_dtype(data[col]) for col in data.columns):
             return False, "All data (excluding headers) must be numeric."
 
-        if len(data) < self.min_rows or len(data) > self.max_rows:
+        if len(data) < self.min_rows:
+            return False, f"File must contain at least {self.min_rows} rows."
+
+        if self.max_rows is not None and len(data) > self.max_rows:
             return False, f"File length must be between {self.min_rows} and {self.max_rows} rows."
 
         if not all(data.iloc[:, 0] == sorted(data.iloc[:, 0])):
@@ -40,6 +40,25 @@ class DelayEmbedding:
         self.embeddings = embedding.fit_transform(self.timeseries.reshape(-1, 1))
         return self.embeddings
 
+    def generate_strided_embedding(self):
+        """
+        Generate the delay embedding as a strided view of the timeseries data.
+
+        Produces the same points as generate_embedding without the giotto-tda
+        transformer overhead, which makes it cheap enough to call on every change
+        of dimension or lag (e.g., for live previews).
+
+        Returns:
+            np.ndarray: The generated embeddings.
+        """
+        self.timeseries = np.asarray(self.timeseries, dtype=float)
+        window = (self.dimension - 1) * self.lag + 1
+        if len(self.timeseries) < window:
+            raise ValueError(f"Timeseries of length {len(self.timeseries)} is too short for dimension {self.dimension} and lag {self.lag}.")
+        windows = np.lib.stride_tricks.sliding_window_view(self.timeseries, window)
+        self.embeddings = windows[:, ::self.lag]
+        return self.embeddings
+
     def verify_embedding(self):
         """
         Verify the quality of the generated embedding (not implmented yet).
@@ -47,3 +66,88 @@ class DelayEmbedding:
         This method is intended to verify the quality of the embedding by using K-nearest-neighbors.
         """
         pass
+
+
+class IncrementalDelayEmbedding:
+    """
+    A class to delay-embed a time series that grows by appended samples.
+
+    Samples are kept in a buffer that doubles in capacity when full, so appending k
+    samples costs O(k) amortized, and the embedding is a strided view of the buffer
+    that costs nothing to regenerate. Points already embedded are never recomputed.
+
+    Attributes:
+        dimension (int): The embedding dimension.
+        lag (int): The lag parameter for embedding.
+        n_samples (int): Number of samples appended so far.
+    """
+
+    def __init__(self, dimension, lag, dtype=float, capacity=1024):
+        """
+        Initialize the IncrementalDelayEmbedding class with an empty buffer.
+
+        Args:
+            dimension (int): The embedding dimension.
+            lag (int): The lag parameter for embedding.
+            dtype (type or str): dtype of the buffer and therefore of the embedding.
+            capacity (int): Initial buffer size, in samples.
+        """
+        self.dimension = dimension
+        self.lag = lag
+        self.n_samples = 0
+        self._buffer = np.empty(max(capacity, 1), dtype=dtype)
+
+    @property
+    def timeseries(self):
+        """
+        np.ndarray: A view of the samples appended so far.
+        """
+        return self._buffer[:self.n_samples]
+
+    @property
+    def n_points(self):
+        """
+        int: Number of embedded points available so far.
+        """
+        return max(self.n_samples - (self.dimension - 1) * self.lag, 0)
+
+    def extend(self, values):
+        """
+        Append new samples.
+
+        Args:
+            values (array-like): The new samples, in time order.
+
+        Returns:
+            int: Number of new embedded points the samples complete.
+        """
+        values = np.asarray(values, dtype=self._buffer.dtype).ravel()
+        n_points = self.n_points
+        needed = self.n_samples + len(values)
+        if needed > len(self._buffer):
+            buffer = np.empty(max(needed, 2 * len(self._buffer)), dtype=self._buffer.dtype)
+            buffer[:self.n_samples] = self.timeseries
+            self._buffer = buffer
+        self._buffer[self.n_samples:needed] = values
+        self.n_samples = needed
+        return self.n_points - n_points
+
+    def reset(self):
+        """
+        Discard all samples, e.g. when the source file was truncated or replaced.
+        """
+        self.n_samples = 0
+
+    def generate_strided_embedding(self):
+        """
+        Generate the delay embedding of the samples appended so far, as a view of the buffer.
+
+        The view is invalidated by the next call to extend, which may reallocate the buffer.
+
+        Returns:
+            np.ndarray: The embedded points, shape (n_points, dimension).
+        """
+        window = (self.dimension - 1) * self.lag + 1
+        if self.n_samples < window:
+            return np.empty((0, self.dimension), dtype=self._buffer.dtype)
+        return np.lib.stride_tricks.sliding_window_view(self.timeseries, window)[:, ::self.lag]
@@ -0,0 +1,328 @@
+import heapq
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from sklearn.neighbors import BallTree
+
+# Similarity-search index over stored persistence diagrams
+# Example usage:
+#     index = DiagramIndex()
+#     index.add(diagrams, key='wind_2024_01')
+#     index.build()
+#     matches = index.query(query_diagrams, k=5)
+
+# Largest (candidates x stored points x query points) distance block computed at once
+BLOCK_ELEMENTS = 2**18
+
+
+def flatten_diagrams(diagrams):
+    """
+    Stack the per-dimension diagrams into a single array of finite (birth, death) pairs.
+
+    This mirrors PersistenceAnalysis.compute_wasserstein_distance, which stacks all
+    homology classes before comparing; persim ignores non-finite points, so they are
+    dropped here up front.
+
+    Args:
+        diagrams (list): Persistence diagrams (one per homology class).
+
+    Returns:
+        np.ndarray: An (n, 2) array of finite persistence pairs.
+    """
+    non_empty = [np.asarray(dgm, dtype=float).reshape(-1, 2) for dgm in diagrams]
+    flat = np.vstack(non_empty) if non_empty else np.empty((0, 2))
+    return flat[np.all(np.isfinite(flat), axis=1)]
+
+
+def diagonal_coordinates(diagrams):
+    """
+    Rotate the finite persistence pairs so that the diagonal becomes the x axis.
+
+    persim.wasserstein matches points at Euclidean cost and a point to the diagonal at
+    its Euclidean distance from it, (death - birth) / sqrt(2). Both are preserved by the
+    rotation, after which the cost of a point's diagonal match is simply its y coordinate.
+
+    Args:
+        diagrams (list): Persistence diagrams (one per homology class).
+
+    Returns:
+        np.ndarray: An (n, 2) array of (position along the diagonal, distance from it).
+    """
+    flat = flatten_diagrams(diagrams)
+    return np.column_stack([flat[:, 0] + flat[:, 1], flat[:, 1] - flat[:, 0]]) / np.sqrt(2.0)
+
+
+def matching_cost(points1, points2):
+    """
+    Compute the optimal matching cost between two rotated diagrams.
+
+    This is the assignment problem persim.wasserstein solves, and gives the same value,
+    without its input checks and warnings, which dominate the run time on small diagrams.
+
+    Args:
+        points1 (np.ndarray): The first diagram, from diagonal_coordinates.
+        points2 (np.ndarray): The second diagram, from diagonal_coordinates.
+
+    Returns:
+        float: The Wasserstein distance.
+    """
+    n, m = len(points1), len(points2)
+    cost = np.zeros((n + m, n + m))
+    cost[:n, :m] = np.sqrt(((points1[:, None, :] - points2[None, :, :]) ** 2).sum(axis=2))
+    # Any point may take any diagonal slot; diagonal slots pair with each other for free
+    cost[:n, m:] = points1[:, 1:]
+    cost[n:, :m] = points2[:, 1]
+    rows, cols = linear_sum_assignment(cost)
+    return float(cost[rows, cols].sum())
+
+
+def exact_wasserstein(diagrams1, diagrams2):
+    """
+    Compute the exact Wasserstein distance between two sets of persistence diagrams.
+
+    Args:
+        diagrams1 (list): Persistence diagrams from the first point cloud.
+        diagrams2 (list): Persistence diagrams from the second point cloud.
+
+    Returns:
+        float: The Wasserstein distance, equal to persim.wasserstein on the stacked diagrams.
+    """
+    return matching_cost(diagonal_coordinates(diagrams1), diagonal_coordinates(diagrams2))
+
+
+def reduction_bounds(query_points, candidates):
+    """
+    Bound the matching cost from below for many candidate diagrams at once.
+
+    Any pair of row and column potentials whose sums never exceed the assignment costs
+    bounds the optimal cost from below (linear programming duality). The first step of
+    the Hungarian method builds such a pair cheaply: subtract each row's minimum, then
+    each column's minimum of what is left. This is done both ways round, rows first and
+    columns first, and the larger result kept. Candidates are zero-padded to a common
+    size; padding points lie on the diagonal and change neither the bound nor the
+    distance.
+
+    Args:
+        query_points (np.ndarray): The query diagram, from diagonal_coordinates.
+        candidates (np.ndarray): A (B, n, 2) array of padded candidate diagrams.
+
+    Returns:
+        np.ndarray: A lower bound on the Wasserstein distance to each candidate.
+    """
+    if len(query_points) == 0 or candidates.shape[1] == 0:
+        return candidates[:, :, 1].sum(axis=1) + query_points[:, 1].sum()
+    dx = np.subtract.outer(candidates[:, :, 0], query_points[:, 0])
+    dy = np.subtract.outer(candidates[:, :, 1], query_points[:, 1])
+    distances = np.sqrt(dx * dx + dy * dy)
+    candidate_heights = candidates[:, :, 1]
+    query_heights = query_points[None, :, 1]
+
+    # Rows are candidate points and the query's diagonal slots, which reduce by zero
+    rows = np.minimum(candidate_heights, distances.min(axis=2))
+    columns = np.minimum(query_heights, (distances - rows[:, :, None]).min(axis=1))
+    rows_first = rows.sum(axis=1) + columns.sum(axis=1)
+
+    columns = np.minimum(query_heights, distances.min(axis=1))
+    rows = np.minimum(candidate_heights, (distances - columns[:, None, :]).min(axis=2))
+    columns_first = rows.sum(axis=1) + columns.sum(axis=1)
+    return np.maximum(rows_first, columns_first)
+
+
+def wasserstein_lower_bound(diagrams1, diagrams2):
+    """
+    Compute a cheap lower bound on the Wasserstein distance between two sets of diagrams.
+
+    Args:
+        diagrams1 (list): Persistence diagrams from the first point cloud.
+        diagrams2 (list): Persistence diagrams from the second point cloud.
+
+    Returns:
+        float: A lower bound on the Wasserstein distance (see reduction_bounds).
+    """
+    return float(reduction_bounds(diagonal_coordinates(diagrams1), diagonal_coordinates(diagrams2)[None])[0])
+
+
+class DiagramIndex:
+    """
+    An exact nearest-neighbor index over persistence diagrams under the Wasserstein distance.
+
+    Each diagram set is vectorized into a fixed-length feature whose L1 distance is a
+    proven lower bound on the Wasserstein distance (see vectorize), and the features are
+    stored in a ball tree under the L1 metric. A query pulls candidates from the tree in
+    order of that bound, in batches of growing size, tightens the bound for a whole
+    batch at once with reduction_bounds, and solves the exact assignment problem only
+    for candidates whose bound is below the k-th best distance found so far. It stops
+    once the tree holds no candidate whose bound could beat the k-th best, so the
+    results are the true k nearest neighbors.
+
+    Attributes:
+        resolution (int): Number of diagonal-distance bins in the feature vectors.
+        keys (list): Keys of the stored diagram sets, in insertion order.
+        diagrams (list): The stored diagram sets, in insertion order.
+        features (np.ndarray or None): Feature vectors of the stored sets, one per row. Initially set to None.
+        tree (sklearn.neighbors.BallTree or None): Ball tree over the features. Initially set to None.
+        exact_computations (int): Number of exact Wasserstein distances computed by the last query.
+    """
+
+    def __init__(self, resolution=32):
+        """
+        Initialize the DiagramIndex class with the feature resolution.
+
+        Args:
+            resolution (int): Number of diagonal-distance bins in the feature vectors.
+        """
+        self.resolution = resolution
+        self.keys = []
+        self.diagrams = []
+        self.features = None
+        self.tree = None
+        self.exact_computations = 0
+        self._points = []
+        self._counts = None
+        self._offsets = None
+        self._pooled = None
+        self._edges = None
+        self._dirty = True
+
+    def __len__(self):
+        return len(self.diagrams)
+
+    def add(self, diagrams, key=None):
+        """
+        Store a set of persistence diagrams in the index.
+
+        The index is rebuilt lazily on the next query, or explicitly by calling build().
+
+        Args:
+            diagrams (list): Persistence diagrams (one per homology class).
+            key (hashable, optional): Identifier returned by queries. Defaults to the insertion position.
+        """
+        self.keys.append(len(self.diagrams) if key is None else key)
+        self.diagrams.append(diagrams)
+        self._points.append(diagonal_coordinates(diagrams))
+        self._dirty = True
+
+    def build(self):
+        """
+        Fix the feature bins from the stored diagrams, vectorize every stored set and build the tree.
+        """
+        if not self.diagrams:
+            raise ValueError("Cannot build an index with no stored diagrams.")
+
+        # Quantile bins put the resolution where the stored diagonal distances actually are
+        self._counts = np.array([len(points) for points in self._points])
+        self._offsets = np.concatenate([[0], np.cumsum(self._counts)[:-1]])
+        self._pooled = np.concatenate(self._points + [np.zeros((1, 2))])
+        heights = self._pooled[:-1, 1]
+        if len(heights) > 0:
+            edges = np.unique(np.quantile(heights, np.linspace(0.0, 1.0, self.resolution)))
+        else:
+            edges = np.empty(0)
+        self._edges = np.concatenate([[0.0], edges[edges > 0]])
+
+        self.features = np.vstack([self._vectorize_points(points) for points in self._points])
+        self.tree = BallTree(self.features, metric='manhattan')
+        self._dirty = False
+
+    def vectorize(self, diagrams):
+        """
+        Vectorize a set of persistence diagrams into a fixed-length lower-bound feature.
+
+        Let G(t) count the points farther than t from the diagonal. Matching two points
+        costs at least the difference of their distances from the diagonal, so matching
+        both sets' distances in sorted order, each side padded with zeros for the other's
+        diagonal matches, costs at most the Wasserstein distance; that cost is exactly the
+        integral of |G1(t) - G2(t)| over t >= 0. Feature j is the integral of G over the
+        j-th bin (the last bin is unbounded), and the integral of |G1 - G2| over a bin is
+        at least the absolute difference of the integrals of G1 and G2, so the L1 distance
+        between two features never exceeds the Wasserstein distance between their sets.
+
+        Args:
+            diagrams (list): Persistence diagrams (one per homology class).
+
+        Returns:
+            np.ndarray: A feature vector with one entry per bin.
+        """
+        if self._dirty:
+            self.build()
+        return self._vectorize_points(diagonal_coordinates(diagrams))
+
+    def _vectorize_points(self, points):
+        widths = np.append(np.diff(self._edges), np.inf)
+        return np.clip(points[:, 1:] - self._edges[None, :], 0.0, widths[None, :]).sum(axis=0)
+
+    def _padded(self, indices):
+        # Gather the stored points of the given sets into a zero-padded (B, n, 2) array
+        counts = self._counts[indices]
+        slots = np.arange(counts.max(initial=0))
+        positions = self._offsets[indices][:, None] + slots[None, :]
+        # Out-of-range slots read the zero row appended to the pooled points
+        positions = np.where(slots[None, :] < counts[:, None], positions, len(self._pooled) - 1)
+        return self._pooled[positions]
+
+    def _reduction_bounds(self, query_points, indices):
+        # Candidates of similar size are batched together to keep padding small
+        bounds = np.empty(len(indices))
+        order = np.argsort(self._counts[indices], kind='stable')
+        counts = np.maximum(self._counts[indices[order]], 1) * max(len(query_points), 1)
+        start = 0
+        while start < len(order):
+            # Sizes ascend, so a block is as large as its last set times its length
+            elements = np.arange(1, len(order) - start + 1) * counts[start:]
+            stop = start + max(int(np.searchsorted(elements, BLOCK_ELEMENTS, side='right')), 1)
+            block = order[start:stop]
+            bounds[block] = reduction_bounds(query_points, self._padded(indices[block]))
+            start = stop
+        return bounds
+
+    def query(self, diagrams, k=5, batch_size=256):
+        """
+        Find the stored diagram sets closest to the query in Wasserstein distance.
+
+        Args:
+            diagrams (list): Persistence diagrams (one per homology class) to search for.
+            k (int): Number of neighbors to return.
+            batch_size (int): Candidates pulled from the tree in the first batch; each later batch doubles the total.
+
+        Returns:
+            list: Up to k (key, distance) tuples, sorted by ascending Wasserstein distance.
+        """
+        if self._dirty:
+            self.build()
+
+        k = min(k, len(self.diagrams))
+        if k <= 0:
+            return []
+        query_points = diagonal_coordinates(diagrams)
+        feature = self._vectorize_points(query_points)[None, :]
+        best = []
+        self.exact_computations = 0
+        # Candidates pulled from the tree, keyed by their tightened bound
+        heap = []
+        pulled = 0
+        # No set still in the tree has a feature bound below this
+        tree_bound = 0.0
+        while True:
+            if pulled < len(self.diagrams) and (not heap or heap[0][0] > tree_bound):
+                n_candidates = min(max(2 * pulled, batch_size, k), len(self.diagrams))
+                feature_bounds, indices = self.tree.query(feature, k=n_candidates)
+                feature_bounds, indices = feature_bounds[0, pulled:], indices[0, pulled:]
+                pulled = n_candidates
+                tree_bound = feature_bounds[-1] if pulled < len(self.diagrams) else np.inf
+                if len(best) == k:
+                    keep = feature_bounds < best[-1][0]
+                    feature_bounds, indices = feature_bounds[keep], indices[keep]
+                bounds = np.maximum(feature_bounds, self._reduction_bounds(query_points, indices))
+                heap.extend(zip(bounds.tolist(), indices.tolist()))
+                heapq.heapify(heap)
+                continue
+
+            # The heap's smallest bound is now the smallest of all sets not yet computed exactly
+            if not heap or (len(best) == k and heap[0][0] >= best[-1][0]):
+                break
+            _, index = heapq.heappop(heap)
+            best.append((matching_cost(query_points, self._points[index]), index))
+            self.exact_computations += 1
+            best.sort()
+            del best[k:]
+
+        return [(self.keys[index], distance) for distance, index in best]
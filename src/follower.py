@@ -0,0 +1,345 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import io
+import multiprocessing
+import os
+import time
+import numpy as np
+import pandas as pd
+import cost_estimator
+import delay_embedder
+import pipeline
+
+# Follow mode: incremental analysis of two CSV files that loggers keep appending to
+# Example usage:
+#     follow = FollowAnalysis(['DataFile1.csv', 'DataFile2.csv'], 2, 15, interval=60, change_threshold=0.05)
+#     follow.run(report=print)  # until interrupted, then shuts down the worker processes
+
+
+class CSVTail:
+    """
+    A class to read rows appended to a two-column CSV file since the last read.
+
+    Only the bytes after the last complete line read are parsed, so each read costs
+    time proportional to the new data, not to the file size. A trailing line without
+    its newline is left for the next read, since the logger may still be writing it.
+    If the file shrinks or is replaced, reading starts over from the beginning.
+
+    Attributes:
+        file_path (str): The path to the CSV file.
+        offset (int): Byte offset just past the last complete line read.
+        skipped_lines (int): Number of lines that could not be parsed as two numbers.
+    """
+
+    def __init__(self, file_path):
+        """
+        Initialize the CSVTail class at the start of the file.
+
+        Args:
+            file_path (str): The path to the CSV file.
+        """
+        self.file_path = file_path
+        self.offset = 0
+        self.skipped_lines = 0
+        self._inode = None
+
+    def read_rows(self):
+        """
+        Read and parse the complete lines appended since the last call.
+
+        Returns:
+            tuple: (rows, restarted), where rows is an (n, 2) float array of (timestep, signal)
+                rows and restarted is True if the file was truncated or replaced, in which case
+                rows holds the file's content from the beginning.
+        """
+        with open(self.file_path, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            restarted = self._inode is not None and (stat.st_ino != self._inode or stat.st_size < self.offset)
+            if restarted:
+                self.offset = 0
+            self._inode = stat.st_ino
+            file.seek(self.offset)
+            data = file.read(stat.st_size - self.offset)
+
+        complete = data.rfind(b'\n') + 1
+        data = data[:complete]
+        if self.offset == 0:
+            data = self._strip_header(data)
+        self.offset += complete
+        return self.parse(data), restarted
+
+    def parse(self, data):
+        """
+        Parse complete CSV lines of two numeric columns.
+
+        Clean data goes through pandas' C parser in one call; if any line is malformed,
+        including lines with a missing field, which pandas fills with NaN, the lines are
+        parsed one by one and the malformed ones are counted and skipped.
+
+        Args:
+            data (bytes): Complete lines.
+
+        Returns:
+            np.ndarray: The (n, 2) float array of parsed rows.
+        """
+        if not data.strip():
+            return np.empty((0, 2))
+        try:
+            rows = pd.read_csv(io.BytesIO(data), header=None, dtype=float).to_numpy()
+            if rows.shape[1] == 2 and not np.isnan(rows).any():
+                return rows
+        except (ValueError, pd.errors.ParserError):
+            pass
+
+        rows = []
+        for line in data.splitlines():
+            fields = line.split(b',')
+            try:
+                row = tuple(float(field) for field in fields)
+                if len(row) != 2 or np.isnan(row).any():
+                    raise ValueError(line)
+                rows.append(row)
+            except ValueError:
+                self.skipped_lines += bool(line.strip())
+        return np.array(rows, dtype=float).reshape(-1, 2)
+
+    def _strip_header(self, data):
+        # The first line is a header unless both of its fields are numbers
+        first_line, _, rest = data.partition(b'\n')
+        try:
+            [float(field) for field in first_line.split(b',')]
+            return data
+        except ValueError:
+            return rest
+
+
+class FollowAnalysis:
+    """
+    A class to keep the two-series analysis up to date while the input files grow.
+
+    Each poll reads only the newly appended rows, extends the delay embeddings with
+    them, and recomputes persistence and the Wasserstein comparison only when it is
+    due: once both series have enough samples, then whenever the embedded point count
+    of either series has grown by change_threshold since the last analysis, or interval
+    seconds have passed and there is any new data. Persistence itself is a whole-cloud
+    computation, so its cost is capped by admission control (see cost_estimator.py)
+    rather than by the size of the update.
+
+    The signal is analyzed as logged: preprocessing steps such as detrending and
+    normalization change every past value when a sample arrives, so they are not applied.
+
+    The persistence computations of every update run in one process pool, started at
+    the first analysis and kept until close(), so that each update does not pay for
+    starting worker processes and importing ripser again.
+
+    Attributes:
+        tails (list): A CSVTail per input file.
+        embeddings (list): A delay_embedder.IncrementalDelayEmbedding per input file.
+        mode (str): 'rips' or 'sublevel', as in pipeline.build_analysis_graph.
+        interval (float): Seconds after which new data triggers an analysis regardless of its size.
+        change_threshold (float): Relative growth in points that triggers an analysis early.
+        min_samples (int): Samples each series needs before the first analysis.
+        updates (int): Number of analyses run so far.
+    """
+
+    def __init__(self, file_paths, dimension, lag, mode='rips', estimator=None, memory_budget=2 * 2**30,
+                 time_budget=600.0, precision='float64', interval=60.0, change_threshold=0.05, min_samples=100,
+                 clock=time.monotonic):
+        """
+        Initialize the FollowAnalysis class with the files to follow and the analysis settings.
+
+        Args:
+            file_paths (list): The paths to the two CSV files.
+            dimension (int): The embedding dimension.
+            lag (int): The lag parameter for embedding.
+            mode (str): 'rips' or 'sublevel'.
+            estimator (cost_estimator.CostEstimator, optional): The cost model. Loaded or calibrated if None.
+            memory_budget (float): Peak memory allowed per persistence computation, in bytes.
+            time_budget (float): Run time allowed per persistence computation, in seconds.
+            precision (str): 'float64' or 'float32'.
+            interval (float): Seconds after which new data triggers an analysis regardless of its size.
+            change_threshold (float): Relative growth in points that triggers an analysis early.
+            min_samples (int): Samples each series needs before the first analysis.
+            clock (callable): Returns the current time in seconds.
+        """
+        self.tails = [CSVTail(file_path) for file_path in file_paths]
+        self.embeddings = [delay_embedder.IncrementalDelayEmbedding(dimension, lag, dtype=precision) for _ in file_paths]
+        self.dimension = dimension
+        self.lag = lag
+        self.mode = mode
+        self.estimator = estimator
+        self.memory_budget = memory_budget
+        self.time_budget = time_budget
+        self.precision = precision
+        self.interval = interval
+        self.change_threshold = change_threshold
+        self.min_samples = min_samples
+        self.clock = clock
+        self.updates = 0
+        self._analyzed_points = None
+        self._analyzed_at = None
+        self._diagrams = [None] * len(file_paths)
+        self._new_samples = [0] * len(file_paths)
+        self._process_pool = None
+
+    def poll(self, report=print):
+        """
+        Read newly appended rows and rerun the analysis if it is due.
+
+        Args:
+            report (callable): Receives progress messages and summaries.
+
+        Returns:
+            dict or None: The summary of the analysis if one ran (see summarize), else None.
+        """
+        for i, (tail, embedding) in enumerate(zip(self.tails, self.embeddings)):
+            rows, restarted = tail.read_rows()
+            if restarted:
+                report(f"File {i + 1} was truncated or replaced; reading it again from the start.")
+                embedding.reset()
+                self._new_samples[i] = 0
+                self._analyzed_points = None
+            embedding.extend(rows[:, 1])
+            self._new_samples[i] += len(rows)
+
+        if not self.is_due():
+            return None
+        try:
+            comparison = self.analyze(report)
+        except pipeline.PipelineAbort as e:
+            report(f"Update skipped: {e}")
+            return None
+        summary = self.summarize(comparison)
+        report(self.format_summary(summary))
+        return summary
+
+    def is_due(self):
+        """
+        Decide whether the data has changed enough, or long enough ago, to rerun the analysis.
+
+        Returns:
+            bool: Whether to run the analysis now.
+        """
+        if any(embedding.n_samples < max(self.min_samples, 1) or embedding.n_points == 0 for embedding in self.embeddings):
+            return False
+        if self._analyzed_points is None:
+            return True
+        growth = [embedding.n_points - previous for embedding, previous in zip(self.embeddings, self._analyzed_points)]
+        if not any(growth):
+            return False
+        if any(added >= self.change_threshold * max(previous, 1) for added, previous in zip(growth, self._analyzed_points)):
+            return True
+        return self.clock() - self._analyzed_at >= self.interval
+
+    def analyze(self, report=print):
+        """
+        Compute persistence for both series as they stand and compare them.
+
+        Uses the stage graph of pipeline.py, so the two persistence computations run
+        side by side in the worker processes of the long-lived pool. A series that has
+        not grown since the last analysis reuses its diagrams.
+
+        Args:
+            report (callable): Receives progress messages.
+
+        Returns:
+            dict: The wasserstein_dist, std_lifetimes1 and std_lifetimes2 values.
+        """
+        if self.mode == 'rips' and self.estimator is None:
+            self.estimator = cost_estimator.CostEstimator.load_or_calibrate()
+
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn"))
+        graph = pipeline.StageGraph(process_pool=self._process_pool)
+        for i, embedding in enumerate(self.embeddings, start=1):
+            if self._analyzed_points is not None and self._analyzed_points[i - 1] == embedding.n_points:
+                graph.add_stage(f'persist{i}', lambda diagrams=self._diagrams[i - 1]: diagrams)
+                continue
+            # A copy, so that the worker processes never see a buffer that extend() reallocates
+            graph.add_stage(f'timeseries{i}', partial(np.copy, embedding.timeseries))
+            if self.mode == 'sublevel':
+                graph.add_stage(f'persist{i}', pipeline.compute_sublevel_persistence, deps=(f'timeseries{i}',), in_process=True)
+                continue
+            graph.add_stage(f'admit{i}',
+                            lambda timeseries, i=i: pipeline.admit_series(self.estimator, timeseries, self.dimension, self.lag,
+                                                                          self.memory_budget, self.time_budget, i, self.precision),
+                            deps=(f'timeseries{i}',),
+                            done_message=lambda decision, i=i: f"Time series {i}: {decision.message}")
+            graph.add_stage(f'embed{i}', partial(pipeline.embed_series, dimension=self.dimension, lag=self.lag),
+                            deps=(f'timeseries{i}',))
+            graph.add_stage(f'persist{i}', partial(pipeline.compute_persistence, memory_budget=self.memory_budget),
+                            deps=(f'embed{i}', f'admit{i}'), in_process=True)
+        graph.add_stage('compare', pipeline.compare_diagrams, deps=('persist1', 'persist2'))
+
+        try:
+            results = graph.run(report=report)
+        except BaseException:
+            # A failed run terminates the pool's workers; start a new pool next time
+            self.close()
+            raise
+        comparison = results['compare']
+        self._diagrams = [results['persist1'], results['persist2']]
+        self.updates += 1
+        self._analyzed_points = [embedding.n_points for embedding in self.embeddings]
+        self._analyzed_at = self.clock()
+        return comparison
+
+    def summarize(self, comparison):
+        """
+        Combine a comparison with the growth of each series since the previous summary.
+
+        Args:
+            comparison (dict): The output of analyze.
+
+        Returns:
+            dict: update, samples, new_samples, wasserstein_dist, std_lifetimes1 and std_lifetimes2.
+        """
+        summary = dict(comparison, update=self.updates,
+                       samples=[embedding.n_samples for embedding in self.embeddings],
+                       new_samples=list(self._new_samples))
+        self._new_samples = [0] * len(self.embeddings)
+        return summary
+
+    def format_summary(self, summary):
+        """
+        Format a summary as one line of text.
+
+        Args:
+            summary (dict): The output of summarize.
+
+        Returns:
+            str: The summary line.
+        """
+        series = ", ".join(f"series {i} {samples} samples (+{new})"
+                           for i, (samples, new) in enumerate(zip(summary['samples'], summary['new_samples']), start=1))
+        return (f"Update {summary['update']}: {series}; Wasserstein distance {summary['wasserstein_dist']:.6g}; "
+                f"lifetime std {summary['std_lifetimes1']:.6g} / {summary['std_lifetimes2']:.6g}.")
+
+    def close(self):
+        """
+        Shut down the worker processes, terminating any persistence computation still running.
+
+        The next analysis starts a new pool.
+        """
+        if self._process_pool is not None:
+            pipeline.terminate_workers(self._process_pool)
+            self._process_pool.shutdown(wait=True)
+            self._process_pool = None
+
+    def run(self, poll_seconds=1.0, report=print):
+        """
+        Poll the files until interrupted with Ctrl+C, then shut down the worker processes.
+
+        Args:
+            poll_seconds (float): Seconds to sleep between polls.
+            report (callable): Receives progress messages and summaries.
+        """
+        report(f"Following {', '.join(tail.file_path for tail in self.tails)}. Press Ctrl+C to stop.")
+        try:
+            while True:
+                self.poll(report)
+                time.sleep(poll_seconds)
+        except KeyboardInterrupt:
+            report(f"Stopped following after {self.updates} updates.")
+        finally:
+            self.close()
@@ -31,10 +31,14 @@ Workflow:
         each persistence diagram
 
 Dependencies:
+- pipeline.py: Runs the stages below as a graph, overlapping independent stages.
 - data_validator.py: Validates the data in the provided CSV files.
 - delay_embedder.py: Delay-embeds the time series to produce point clouds.
 - persistence_analyzer.py: Analyzes the point clouds using persistence homology 
     to produce persistence diagrams.
+- follower.py: Follows growing CSV files and reruns the analysis incrementally.
+- blocked_rips.py: Computes Rips persistence in float32 with blocked pairwise
+    distances, within a memory budget.
 - visualizer.py: Visualizes the point clouds and persistence diagrams, and 
     calculates the Wasserstein distance.
 - other python packages from the PSL or installable by pip, as detailed in 
@@ -45,6 +49,44 @@ To run the script, from within /TDA-project/src/, use one of the following comma
     python main.py
     python3 main.py
 
+Options:
+    --memory-budget MB    Peak memory allowed for each persistence computation
+                          (default 2048). Series whose estimated cost exceeds the
+                          budget are subsampled automatically.
+    --time-budget SECONDS Run time allowed for each persistence computation
+                          (default 600).
+    --detrend {none,constant,linear}
+                          Remove the mean or a linear trend before embedding
+                          (default none).
+    --target-rate RATE    Low-pass filter and decimate each series to at most
+                          RATE samples per time unit before embedding.
+    --normalize {none,zscore,minmax}
+                          Rescale each series before embedding (default none).
+    --no-resample         Do not interpolate unevenly spaced timesteps onto a
+                          regular grid.
+    --mode {rips,sublevel}
+                          Persistence computed for each series: Vietoris-Rips
+                          persistence of the delay embedding (default), or the
+                          much faster sublevel-set (H0) persistence of the raw
+                          signal.
+    --precision {float64,float32}
+                          Numeric precision of the Rips persistence computation.
+                          float32 computes pairwise distances in cache-sized
+                          blocks and cuts peak memory by about 40%; the diagrams
+                          agree with float64 to about 1e-7 of the data range
+                          (see blocked_rips.precision_check). If even float32
+                          exceeds --memory-budget, long edges are dropped
+                          instead of subsampling.
+    --follow              Keep following both files as new rows are appended,
+                          parsing only the new bytes, and print an updated
+                          summary whenever the analysis is rerun. Stop with
+                          Ctrl+C. Preprocessing options are not applied.
+    --interval SECONDS    In follow mode, rerun the analysis on any new data
+                          after this many seconds (default 60).
+    --change-threshold FRACTION
+                          In follow mode, rerun the analysis as soon as either
+                          point cloud has grown by this fraction (default 0.05).
+
 Authors:
     Peter Mikulecky and Patrick Hudson
 
@@ -53,12 +95,10 @@ Date:
 
 """
 # Imports
-import numpy as np
-import csv
-import data_validator
-import delay_embedder
-import persistence_analyzer
-import visualizer
+import argparse
+import follower
+import pipeline
+import preprocessor
 
 def get_dimension_and_lag(input_func=input):
     """
@@ -81,68 +121,101 @@ def get_dimension_and_lag(input_func=input):
         except ValueError:
             print("Invalid input. Please enter an integer value.")
 
-def main():
+def parse_args(argv=None):
+    """
+    Parse the command-line options.
+
+    Args:
+        argv (list, optional): Arguments to parse. Defaults to sys.argv[1:].
+
+    Returns:
+        argparse.Namespace: The parsed options.
+    """
+    parser = argparse.ArgumentParser(description="Topological Data Analysis Visualizer")
+    parser.add_argument("--memory-budget", type=float, default=2048,
+                        help="peak memory allowed for each persistence computation, in MB (default: 2048)")
+    parser.add_argument("--time-budget", type=float, default=600,
+                        help="run time allowed for each persistence computation, in seconds (default: 600)")
+    parser.add_argument("--detrend", choices=["none", "constant", "linear"], default="none",
+                        help="remove the mean or a linear trend before embedding (default: none)")
+    parser.add_argument("--target-rate", type=float, default=None,
+                        help="decimate each series to at most this many samples per time unit")
+    parser.add_argument("--normalize", choices=["none", "zscore", "minmax"], default="none",
+                        help="rescale each series before embedding (default: none)")
+    parser.add_argument("--no-resample", action="store_true",
+                        help="do not interpolate unevenly spaced timesteps onto a regular grid")
+    parser.add_argument("--mode", choices=["rips", "sublevel"], default="rips",
+                        help="Vietoris-Rips persistence of the embedding, or sublevel-set persistence of the signal (default: rips)")
+    parser.add_argument("--precision", choices=["float64", "float32"], default="float64",
+                        help="numeric precision of the Rips persistence computation; float32 cuts peak memory by about 40%% (default: float64)")
+    parser.add_argument("--follow", action="store_true",
+                        help="keep following both files as rows are appended, printing updated summaries")
+    parser.add_argument("--interval", type=float, default=60,
+                        help="in follow mode, rerun the analysis on any new data after this many seconds (default: 60)")
+    parser.add_argument("--change-threshold", type=float, default=0.05,
+                        help="in follow mode, rerun the analysis once a point cloud has grown by this fraction (default: 0.05)")
+    return parser.parse_args(argv)
+
+def build_preprocessing(args):
+    """
+    Build the preprocessing stage from the parsed command-line options.
+
+    Args:
+        args (argparse.Namespace): The parsed options.
+
+    Returns:
+        preprocessor.Preprocessing: The configured preprocessing stage.
+    """
+    return preprocessor.Preprocessing(resample=not args.no_resample,
+                                      detrend=None if args.detrend == "none" else args.detrend,
+                                      target_rate=args.target_rate,
+                                      normalize=None if args.normalize == "none" else args.normalize)
+
+def main(argv=None):
     """
     Main function to execute the Topological Data Analysis Visualizer application.
 
     Steps:
         1. Prompt users for paths to two timeseries .csv files.
         2. Get dimension and lag parameters from user.
-        3. Validate the timeseries data files.
-        4. Convert the second column (i.e., the signal) of each data file to numpy arrays.
-        5. Perform delay embedding on the time series data.
-        6. Perform persistence analysis on the embedded data.
-        7. Generate visualizations and save them to the local directory.
+        3. Run the analysis stage graph (see pipeline.py). For each series, independently
+           and concurrently with the other one:
+            a. Validate the data file and load its columns into numpy arrays.
+            b. Resample, detrend, decimate and normalize the series as configured.
+            c. Estimate the cost of persistence analysis and admit, warn about or subsample it.
+            d. Perform delay embedding, then plot the point cloud while persistence runs.
+            e. Perform persistence analysis and plot the persistence diagram.
+        4. Compare the two sets of diagrams and plot the normalized Wasserstein distance.
+
+    Args:
+        argv (list, optional): Command-line arguments. Defaults to sys.argv[1:].
     """
+    args = parse_args(argv)
+    preprocessing = build_preprocessing(args)
     file1_path = input("Enter path to first data file:")
     file2_path = input("Enter path to second data file:")
     dimension, lag = get_dimension_and_lag()
 
-    print("Validating files...\n")
-    validator = data_validator.Validation(file1_path, file2_path)
-    if not validator.validate_files():
-        print("Invalid files")
+    if args.follow:
+        if args.detrend != "none" or args.normalize != "none" or args.target_rate is not None:
+            print("Preprocessing options are ignored in follow mode.")
+        follow = follower.FollowAnalysis([file1_path, file2_path], dimension, lag, mode=args.mode,
+                                         memory_budget=args.memory_budget * 2**20, time_budget=args.time_budget,
+                                         precision=args.precision, interval=args.interval,
+                                         change_threshold=args.change_threshold)
+        follow.run(report=print)
+        return
+
+    graph = pipeline.build_analysis_graph(file1_path, file2_path, dimension, lag, preprocessing, mode=args.mode,
+                                          memory_budget=args.memory_budget * 2**20, time_budget=args.time_budget,
+                                          precision=args.precision)
+    try:
+        graph.run(report=print)
+    except pipeline.PipelineAbort as e:
+        print(e)
         return
 
-    print("Converting file 1 to array...\n")
-    file1_second_column = []
-    with open(file1_path, 'r') as file1:
-        reader = csv.reader(file1)
-        next(reader)
-        for row in reader:
-            file1_second_column.append(row[1])
-    timeseries1 = np.array(file1_second_column)
-
-    print("Converting file 2 to array...\n")
-    file2_second_column = []
-    with open(file2_path, 'r') as file2:
-        reader = csv.reader(file2)
-        next(reader)
-        for row in reader:
-            file2_second_column.append(row[1])
-    timeseries2 = np.array(file2_second_column)
-
-    print("Delay-embedding timeseries 1...\n")
-    embedding1 = delay_embedder.DelayEmbedding(timeseries1, dimension, lag).generate_embedding()
-    print("Delay-embedding timeseries 2...\n")
-    embedding2 = delay_embedder.DelayEmbedding(timeseries2, dimension, lag).generate_embedding()
-
-    print("Calculating persistence diagrams. UserWarnings are normal and expected. This could take a few minutes...")
-    persistence_analysis = persistence_analyzer.PersistenceAnalysis(embedding1, embedding2)
-    persistence_analysis.diagrams1 = persistence_analysis.generate_persistence_homology(embedding1)
-    persistence_analysis.diagrams2 = persistence_analysis.generate_persistence_homology(embedding2)
-    
-    wasserstein_dist = persistence_analysis.compute_wasserstein_distance(persistence_analysis.diagrams1, persistence_analysis.diagrams2)
-    std_lifetimes1 = persistence_analysis.compute_std_lifetimes(persistence_analysis.diagrams1)
-    std_lifetimes2 = persistence_analysis.compute_std_lifetimes(persistence_analysis.diagrams2)
-
-    print("Generating plots and saving to the application's local directory...\n")
-    visualization = visualizer.Visualization()
-    visualization.plot_point_cloud(embedding1)
-    visualization.plot_point_cloud(embedding2)
-    visualization.plot_persistence_homology(persistence_analysis.diagrams1)
-    visualization.plot_persistence_homology(persistence_analysis.diagrams2)
-    visualization.plot_normalized_wasserstein(wasserstein_dist, std_lifetimes1, std_lifetimes2)
+    print("Plots saved to the application's local directory.")
     print("Thanks for using the Topological Data Analysis Visualizer!")
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 import persim
 from ripser import ripser
 import numpy as np
+import blocked_rips
 
 class PersistenceAnalysis:
     """
@@ -26,19 +27,118 @@ class PersistenceAnalysis:
         self.diagrams1 = None
         self.diagrams2 = None
 
-    def generate_persistence_homology(self, point_cloud):
+    def generate_persistence_homology(self, point_cloud, n_samples=None):
         """
         Generate the persistence homology for a given point cloud.
 
         Args:
             point_cloud (np.ndarray): The input point cloud data.
+            n_samples (int, optional): If given, ripser runs on an evenly spaced subsample
+                of at most this many points (see generate_approximate_persistence_homology).
 
         Returns:
             list: A list of persistence diagrams.
         """
-        diagrams = ripser(point_cloud)['dgms']
+        diagrams = ripser(self._subsample(point_cloud, n_samples))['dgms']
         return diagrams
 
+    def generate_float32_persistence_homology(self, point_cloud, memory_budget=2 * 2**30, n_samples=None):
+        """
+        Generate the persistence homology for a given point cloud in float32 within a memory budget.
+
+        Pairwise distances are computed in float32 in cache-sized tiles (see blocked_rips.py),
+        roughly halving peak memory. If the budget is still too small, long edges are dropped
+        and features dying above the resulting threshold are reported as infinite.
+
+        Args:
+            point_cloud (np.ndarray): The input point cloud data.
+            memory_budget (float): Peak memory allowed for the pairwise distances, in bytes.
+            n_samples (int, optional): If given, ripser runs on an evenly spaced subsample
+                of at most this many points.
+
+        Returns:
+            list: A list of persistence diagrams.
+        """
+        return blocked_rips.blocked_rips_persistence(self._subsample(point_cloud, n_samples), memory_budget)
+
+    def _subsample(self, point_cloud, n_samples):
+        if n_samples is not None and len(point_cloud) > n_samples:
+            indices = np.linspace(0, len(point_cloud) - 1, n_samples).astype(int)
+            point_cloud = point_cloud[indices]
+        return point_cloud
+
+    def generate_approximate_persistence_homology(self, point_cloud, n_samples=300):
+        """
+        Generate approximate persistence homology from an evenly spaced subsample of a point cloud.
+
+        Consecutive points of a delay embedding are close in time and space, so taking
+        every k-th point keeps the overall shape while cutting the ripser cost sharply.
+
+        Args:
+            point_cloud (np.ndarray): The input point cloud data.
+            n_samples (int): Maximum number of points passed to ripser.
+
+        Returns:
+            list: A list of persistence diagrams.
+        """
+        return self.generate_persistence_homology(point_cloud, n_samples)
+
+    def generate_sublevel_persistence(self, timeseries):
+        """
+        Generate the sublevel-set (0-dimensional) persistence of a 1-D signal.
+
+        A fast alternative to generate_persistence_homology that skips the delay embedding:
+        each local minimum of the signal is born at its value and dies, by the elder rule,
+        at the value where its basin merges into an older (lower) one. Samples are visited
+        in sorted order; because neighbors on a line are only i - 1 and i + 1, every
+        component is a contiguous run, so the union-find reduces to tracking run endpoints.
+        The whole computation is O(n log n).
+
+        Args:
+            timeseries (array-like): The input time series data.
+
+        Returns:
+            list: A list holding one persistence diagram (H0), with the global minimum
+                paired with an infinite death, in the same format as ripser's output.
+        """
+        values = np.asarray(timeseries, dtype=float).ravel()
+        n = len(values)
+        if n == 0:
+            return [np.empty((0, 2))]
+
+        order = np.argsort(values, kind='stable').tolist()
+        value_list = values.tolist()
+        # For an active run [a, b]: run_end[a] == b and run_end[b] == a; run_birth holds the run's minimum
+        run_end = [-1] * n
+        run_birth = [0.0] * n
+        pairs = []
+
+        for i in order:
+            value = value_list[i]
+            start, end, birth = i, i, value
+            if i > 0 and run_end[i - 1] != -1:
+                start = run_end[i - 1]
+                birth = run_birth[start]
+            if i < n - 1 and run_end[i + 1] != -1:
+                right_end = run_end[i + 1]
+                right_birth = run_birth[right_end]
+                if start != i:
+                    # Two runs meet at i: the younger one (higher birth) dies here
+                    younger = max(birth, right_birth)
+                    if younger < value:
+                        pairs.append((younger, value))
+                    birth = min(birth, right_birth)
+                else:
+                    birth = right_birth
+                end = right_end
+            run_end[start] = end
+            run_end[end] = start
+            run_birth[start] = birth
+            run_birth[end] = birth
+
+        pairs.append((values.min(), np.inf))
+        return [np.array(pairs, dtype=float)]
+
     def compute_wasserstein_distance(self, diagrams1, diagrams2):
         """
         Compute the Wasserstein distance between two sets of persistence diagrams.
@@ -0,0 +1,372 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import partial
+import multiprocessing
+import numpy as np
+import os
+import cost_estimator
+import data_validator
+import delay_embedder
+import persistence_analyzer
+import visualizer
+
+# Stage-graph execution of the analysis pipeline shared by main.py and TDAVisualizerApp.py
+# Example usage:
+#     graph = build_analysis_graph('DataFile1.csv', 'DataFile2.csv', 2, 15, preprocessor.Preprocessing())
+#     results = graph.run(report=print)
+#     plot_files = [results[name] for name in PLOT_STAGES]
+
+# Stages producing the five plot files, in the order the drivers display them
+PLOT_STAGES = ('plot_cloud1', 'plot_cloud2', 'plot_diagram1', 'plot_diagram2', 'plot_wasserstein')
+
+
+class PipelineAbort(Exception):
+    """
+    Raised by a stage to stop the pipeline with a message meant for the user.
+    """
+
+
+class StageGraph:
+    """
+    A class to run named stages concurrently, each as soon as the stages it depends on finish.
+
+    Stages run in a thread pool by default. Stages marked in_process run in a process
+    pool instead, for work such as ripser that holds the GIL and would otherwise block
+    every other stage; their functions and inputs must be picklable, and their functions
+    importable by module name. The process pool starts its workers with spawn unless told
+    otherwise: forking while thread stages run would copy locks they hold into the
+    children, where nothing ever releases them.
+
+    A caller that runs graphs repeatedly can pass its own process pool, which is then
+    used instead and left running, so that the workers' start-up and imports are paid once.
+
+    Attributes:
+        max_workers (int or None): Size of the thread pool. None lets the executor decide.
+        process_workers (int): Size of the process pool, created only if a stage needs it.
+        mp_context (multiprocessing.context.BaseContext): Start method for the process pool.
+        process_pool (concurrent.futures.ProcessPoolExecutor or None): A pool owned by the caller, or None.
+        stages (dict): Maps a stage name to its (func, deps, message, done_message, in_process) tuple.
+    """
+
+    def __init__(self, max_workers=None, process_workers=2, mp_context=None, process_pool=None):
+        """
+        Initialize the StageGraph class with its worker pool sizes.
+
+        Args:
+            max_workers (int or None): Size of the thread pool.
+            process_workers (int): Size of the process pool.
+            mp_context (multiprocessing.context.BaseContext or None): Start method for the process pool.
+                None means spawn.
+            process_pool (concurrent.futures.ProcessPoolExecutor or None): An existing pool to run
+                in_process stages in. process_workers and mp_context are then ignored.
+        """
+        self.max_workers = max_workers
+        self.process_workers = process_workers
+        self.mp_context = mp_context or multiprocessing.get_context("spawn")
+        self.process_pool = process_pool
+        self.stages = {}
+
+    def add_stage(self, name, func, deps=(), message=None, done_message=None, in_process=False):
+        """
+        Add a stage to the graph.
+
+        Args:
+            name (str): Unique name of the stage; its result is stored under this name.
+            func (callable): Called with the results of deps, in order, as positional arguments.
+            deps (tuple): Names of the stages that must finish first. They must already be added.
+            message (str, optional): Reported when the stage starts.
+            done_message (callable, optional): Called with the stage result; a returned string is reported.
+            in_process (bool): Whether to run the stage in the process pool.
+        """
+        if name in self.stages:
+            raise ValueError(f"Stage {name!r} is already defined.")
+        unknown = [dep for dep in deps if dep not in self.stages]
+        if unknown:
+            raise ValueError(f"Stage {name!r} depends on undefined stages {unknown}.")
+        self.stages[name] = (func, tuple(deps), message, done_message, in_process)
+
+    def run(self, report=print):
+        """
+        Run every stage, starting each one as soon as its dependencies have finished.
+
+        If a stage raises, no further stages are started, queued stages are cancelled, the
+        process pool's workers are terminated and the exception is re-raised once the
+        running thread stages finish. A pool passed to the constructor is shut down too in
+        that case, and its owner must replace it.
+
+        Args:
+            report (callable): Receives the progress messages of the stages.
+
+        Returns:
+            dict: Maps each stage name to its result.
+        """
+        results = {}
+        pending = dict(self.stages)
+        running = {}
+        thread_pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        process_pool = self.process_pool
+        owns_pool = process_pool is None and any(stage[4] for stage in self.stages.values())
+        if owns_pool:
+            process_pool = ProcessPoolExecutor(max_workers=self.process_workers, mp_context=self.mp_context)
+
+        try:
+            while pending or running:
+                ready = [name for name, stage in pending.items() if all(dep in results for dep in stage[1])]
+                for name in ready:
+                    func, deps, message, _, in_process = pending.pop(name)
+                    if message:
+                        report(message)
+                    pool = process_pool if in_process else thread_pool
+                    running[pool.submit(func, *[results[dep] for dep in deps])] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+                    done_message = self.stages[name][3]
+                    text = done_message(results[name]) if done_message else None
+                    if text:
+                        report(text)
+        finally:
+            # Executor.shutdown(cancel_futures=True) needs Python 3.9, so cancel directly
+            for future in running:
+                future.cancel()
+            thread_pool.shutdown(wait=True)
+            if process_pool is not None:
+                if running:
+                    terminate_workers(process_pool)
+                if owns_pool or running:
+                    process_pool.shutdown(wait=True)
+
+        return results
+
+
+def terminate_workers(process_pool):
+    """
+    Terminate the worker processes of a process pool, stopping the stages they are running.
+
+    A running future cannot be cancelled, so without this an aborted run would leave
+    ripser computing in the workers and the interpreter waiting for them at exit. The
+    pool is broken afterwards and must only be shut down.
+
+    Args:
+        process_pool (concurrent.futures.ProcessPoolExecutor): The pool to stop.
+    """
+    for process in list((getattr(process_pool, '_processes', None) or {}).values()):
+        process.terminate()
+
+
+def load_series(file_path, file_number, preprocessing, precision='float64'):
+    """
+    Validate one data file and return its preprocessed signal.
+
+    Args:
+        file_path (str): The path to the CSV file.
+        file_number (int): 1 or 2, used in error messages.
+        preprocessing (preprocessor.Preprocessing): The preprocessing stage to apply.
+        precision (str): 'float64' or 'float32', the dtype of the returned signal.
+
+    Returns:
+        np.ndarray: The preprocessed signal.
+    """
+    data, message = data_validator.Validation(file_path, file_path).validate_file(file_path)
+    if data is None:
+        raise PipelineAbort(f"File {file_number} validation failed: {message}")
+    _, timeseries = preprocessing.process(data.iloc[:, 0].to_numpy(dtype=float), data.iloc[:, 1].to_numpy(dtype=float))
+    # The strided embedding is a view, so a float32 signal gives a float32 point cloud for free
+    return timeseries.astype(precision, copy=False)
+
+
+def embed_series(timeseries, dimension, lag, required=True):
+    """
+    Delay-embed one signal.
+
+    Args:
+        timeseries (np.ndarray): The signal.
+        dimension (int): The embedding dimension.
+        lag (int): The lag parameter for embedding.
+        required (bool): Whether a signal that cannot be embedded aborts the pipeline.
+
+    Returns:
+        np.ndarray: The point cloud, or None if the signal cannot be embedded and required is False.
+    """
+    try:
+        return delay_embedder.DelayEmbedding(timeseries, dimension, lag).generate_strided_embedding()
+    except ValueError as e:
+        if required:
+            raise PipelineAbort(str(e))
+        return None
+
+
+def plot_point_cloud(visualization, filename, point_cloud):
+    """
+    Plot a point cloud, if there is one.
+
+    Args:
+        visualization (visualizer.Visualization): Where the plot is written.
+        filename (str): Path of the plot.
+        point_cloud (np.ndarray or None): The point cloud.
+
+    Returns:
+        str: The path of the saved plot, or None if there was no point cloud.
+    """
+    if point_cloud is None:
+        return None
+    return visualization.plot_point_cloud(point_cloud, filename=filename)
+
+
+def admit_series(estimator, timeseries, dimension, lag, memory_budget, time_budget, series_number, precision='float64'):
+    """
+    Run admission control for one signal.
+
+    Args:
+        estimator (cost_estimator.CostEstimator): The cost model.
+        timeseries (np.ndarray): The signal.
+        dimension (int): The embedding dimension.
+        lag (int): The lag parameter for embedding.
+        memory_budget (float): Peak memory allowed, in bytes.
+        time_budget (float): Run time allowed, in seconds.
+        series_number (int): 1 or 2, used in messages.
+        precision (str): 'float64' or 'float32'.
+
+    Returns:
+        cost_estimator.AdmissionDecision: The decision, unless the job was rejected.
+    """
+    decision = estimator.admit(len(timeseries), dimension, lag, memory_budget=memory_budget, time_budget=time_budget,
+                               precision=precision)
+    if decision.action == 'reject':
+        raise PipelineAbort(f"Time series {series_number} cannot be analyzed within the budget. {decision.message}")
+    return decision
+
+
+def compute_persistence(point_cloud, decision, memory_budget=2 * 2**30):
+    """
+    Compute Rips persistence diagrams, subsampling if admission control asked for it.
+
+    Float32 point clouds take the blocked float32 path, which keeps the pairwise
+    distances within memory_budget. Module-level so that it can run in a process pool.
+
+    Args:
+        point_cloud (np.ndarray): The point cloud.
+        decision (cost_estimator.AdmissionDecision): The admission decision for this point cloud.
+        memory_budget (float): Peak memory allowed for the float32 distances, in bytes.
+
+    Returns:
+        list: A list of persistence diagrams.
+    """
+    persistence_analysis = persistence_analyzer.PersistenceAnalysis(point_cloud, None)
+    if point_cloud.dtype == np.float32:
+        return persistence_analysis.generate_float32_persistence_homology(point_cloud, memory_budget, decision.n_samples)
+    return persistence_analysis.generate_persistence_homology(point_cloud, decision.n_samples)
+
+
+def compute_sublevel_persistence(timeseries):
+    """
+    Compute sublevel-set persistence diagrams of a signal.
+
+    Module-level so that it can run in a process pool.
+
+    Args:
+        timeseries (np.ndarray): The signal.
+
+    Returns:
+        list: A list holding one persistence diagram (H0).
+    """
+    return persistence_analyzer.PersistenceAnalysis(None, None).generate_sublevel_persistence(timeseries)
+
+
+def compare_diagrams(diagrams1, diagrams2):
+    """
+    Compute the Wasserstein distance and lifetime spreads of two sets of diagrams.
+
+    Args:
+        diagrams1 (list): Persistence diagrams for the first series.
+        diagrams2 (list): Persistence diagrams for the second series.
+
+    Returns:
+        dict: The wasserstein_dist, std_lifetimes1 and std_lifetimes2 values.
+    """
+    persistence_analysis = persistence_analyzer.PersistenceAnalysis(None, None)
+    comparison = {
+        'wasserstein_dist': persistence_analysis.compute_wasserstein_distance(diagrams1, diagrams2),
+        'std_lifetimes1': persistence_analysis.compute_std_lifetimes(diagrams1),
+        'std_lifetimes2': persistence_analysis.compute_std_lifetimes(diagrams2),
+    }
+    if comparison['std_lifetimes1'] is None or comparison['std_lifetimes2'] is None:
+        raise PipelineAbort("Failed to compute standard deviation of lifetimes for the persistence diagrams.")
+    return comparison
+
+
+def build_analysis_graph(file1_path, file2_path, dimension, lag, preprocessing, mode='rips', estimator=None,
+                         memory_budget=2 * 2**30, time_budget=600.0, visualization=None, mp_context=None,
+                         precision='float64'):
+    """
+    Build the stage graph for a full two-series analysis.
+
+    Each series flows load -> embed -> persistence independently, so loading series 2
+    overlaps with embedding series 1, and each point cloud is plotted as soon as its
+    embedding exists while persistence is still running in the process pool. Sublevel-set
+    persistence does not use the embedding, so in that mode a series too short to embed
+    only loses its point cloud plot, stored as None, rather than aborting the run.
+
+    Args:
+        file1_path (str): The path to the first CSV file.
+        file2_path (str): The path to the second CSV file.
+        dimension (int): The embedding dimension.
+        lag (int): The lag parameter for embedding.
+        preprocessing (preprocessor.Preprocessing): The preprocessing stage applied after loading.
+        mode (str): 'rips' for persistence of the embedding, 'sublevel' for sublevel-set persistence of the signal.
+        estimator (cost_estimator.CostEstimator, optional): The cost model. Loaded or calibrated if None,
+            here rather than in a stage, so that a first-run benchmark never shares the CPU with
+            the load stages and saves skewed timings.
+        memory_budget (float): Peak memory allowed per persistence computation, in bytes.
+        time_budget (float): Run time allowed per persistence computation, in seconds.
+        visualization (visualizer.Visualization, optional): Where plots are written. Defaults to the working directory.
+        mp_context (multiprocessing.context.BaseContext, optional): Start method for the process pool.
+            Defaults to spawn (see StageGraph).
+        precision (str): 'float64', or 'float32' to load, embed and compute Rips persistence in
+            float32 with blocked distance computation (see blocked_rips.py).
+
+    Returns:
+        StageGraph: The graph, ready to run. Plot file paths are stored under PLOT_STAGES; a point
+            cloud plot may be None in sublevel mode.
+    """
+    visualization = visualization or visualizer.Visualization()
+    graph = StageGraph(mp_context=mp_context)
+
+    if mode == 'rips' and estimator is None:
+        estimator = cost_estimator.CostEstimator.load_or_calibrate()
+
+    for i, file_path in ((1, file1_path), (2, file2_path)):
+        graph.add_stage(f'load{i}', partial(load_series, file_path, i, preprocessing, precision),
+                        message=f"Loading and preprocessing file {i}...",
+                        done_message=lambda timeseries, i=i: f"Time series {i}: {len(timeseries)} samples after preprocessing.")
+        graph.add_stage(f'embed{i}', partial(embed_series, dimension=dimension, lag=lag, required=mode != 'sublevel'),
+                        deps=(f'load{i}',), message=f"Delay-embedding timeseries {i}...",
+                        done_message=lambda point_cloud, i=i: None if point_cloud is not None else
+                        f"Time series {i} is too short to delay-embed; its point cloud is not plotted.")
+        graph.add_stage(f'plot_cloud{i}',
+                        partial(plot_point_cloud, visualization, os.path.join(visualization.output_dir, f'point_cloud_{i - 1}.png')),
+                        deps=(f'embed{i}',))
+
+        if mode == 'sublevel':
+            graph.add_stage(f'persist{i}', compute_sublevel_persistence, deps=(f'load{i}',), in_process=True,
+                            message=f"Calculating sublevel-set persistence of timeseries {i}...")
+        else:
+            graph.add_stage(f'admit{i}',
+                            lambda timeseries, i=i: admit_series(estimator, timeseries, dimension, lag, memory_budget, time_budget, i, precision),
+                            deps=(f'load{i}',),
+                            done_message=lambda decision, i=i: f"Time series {i}: {decision.message}")
+            graph.add_stage(f'persist{i}', partial(compute_persistence, memory_budget=memory_budget),
+                            deps=(f'embed{i}', f'admit{i}'), in_process=True,
+                            message=f"Calculating persistence diagram {i}. UserWarnings are normal and expected. This could take a few minutes...")
+
+        graph.add_stage(f'plot_diagram{i}',
+                        partial(visualization.plot_persistence_homology,
+                                filename=os.path.join(visualization.output_dir, f'persistence_diagram_combined_{i - 1}.png')),
+                        deps=(f'persist{i}',))
+
+    graph.add_stage('compare', compare_diagrams, deps=('persist1', 'persist2'))
+    graph.add_stage('plot_wasserstein',
+                    lambda comparison: visualization.plot_normalized_wasserstein(**comparison),
+                    deps=('compare',), message="Generating normalized Wasserstein plot...")
+    return graph
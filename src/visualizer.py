@@ -1,58 +1,188 @@
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import multiprocessing
+import numpy as np
+import os
+import threading
+
+
+def point_cloud_figure(point_cloud):
+    """
+    Build a scatter plot of a point cloud.
+
+    Args:
+        point_cloud (np.ndarray): The point cloud data to be plotted.
+
+    Returns:
+        matplotlib.figure.Figure: The figure, attached to its own Agg canvas.
+    """
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    y = point_cloud[:, 1] if point_cloud.shape[1] > 1 else point_cloud[:, 0]
+    ax.scatter(point_cloud[:, 0], y)
+    ax.set_title("Point Cloud")
+    return fig
+
+
+def persistence_homology_figure(persistence_data):
+    """
+    Build a persistence diagram combining every homology dimension in the data.
+
+    Points with infinite death are drawn on a dashed line just above the largest
+    finite value, labelled as infinity.
+
+    Args:
+        persistence_data (list): Persistence diagrams for different homology dimensions.
+
+    Returns:
+        matplotlib.figure.Figure: The figure, attached to its own Agg canvas.
+    """
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    diagrams = [np.asarray(dgm, dtype=float).reshape(-1, 2) for dgm in persistence_data]
+    finite_values = np.concatenate([dgm[np.isfinite(dgm)] for dgm in diagrams]) if diagrams else np.empty(0)
+    top = finite_values.max() if len(finite_values) > 0 else 1.0
+    bottom = min(finite_values.min(), 0.0) if len(finite_values) > 0 else 0.0
+    infinity = top + 0.1 * max(top - bottom, 1e-12)
+
+    labels = [f"H{dim}" for dim in range(len(diagrams))]
+    has_infinite = False
+    for dim, dgm in enumerate(diagrams):
+        infinite = ~np.isfinite(dgm[:, 1])
+        has_infinite = has_infinite or infinite.any()
+        deaths = np.where(infinite, infinity, dgm[:, 1])
+        ax.scatter(dgm[:, 0], deaths, c=f"C{dim}", label=labels[dim])
+
+    if has_infinite:
+        ax.axhline(infinity, color="k", linestyle="--", linewidth=0.8, label="∞")
+
+    ax.set_title(f"Persistence Diagram ({' and '.join(labels)})")
+    ax.set_xlabel("Birth")
+    ax.set_ylabel("Death")
+    ax.legend()
+    return fig
+
+
+def normalized_wasserstein_figure(wasserstein_dist, std_lifetimes1, std_lifetimes2):
+    """
+    Build a bar chart of the normalized Wasserstein distance for two persistence diagrams.
+
+    Args:
+        wasserstein_dist (float): The Wasserstein distance between two persistence diagrams.
+        std_lifetimes1 (float): The standard deviation of lifetimes for the first persistence diagram.
+        std_lifetimes2 (float): The standard deviation of lifetimes for the second persistence diagram.
+
+    Returns:
+        matplotlib.figure.Figure: The figure, attached to its own Agg canvas.
+    """
+    normalized_wasserstein1 = wasserstein_dist / std_lifetimes1
+    normalized_wasserstein2 = wasserstein_dist / std_lifetimes2
+
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    values = [normalized_wasserstein1, normalized_wasserstein2]
+    labels = ["Normalized Wasserstein (TS1)", "Normalized Wasserstein (TS2)"]
+    colors = ['b', 'g']
+
+    ax.bar(labels, values, color=colors)
+    ax.set_title("Normalized Wasserstein Distance")
+    ax.set_ylabel("Normalized Distance")
+    return fig
+
+
+def save_figure(figure_builder, args, filename):
+    """
+    Build a figure and write it to disk as a PNG.
+
+    Each call owns its figure and canvas, so calls can safely run concurrently.
+
+    Args:
+        figure_builder (callable): One of the *_figure functions in this module.
+        args (tuple): Positional arguments for the figure builder.
+        filename (str): Path of the PNG file to write.
+
+    Returns:
+        str: The path of the written file.
+    """
+    fig = figure_builder(*args)
+    fig.savefig(filename)
+    return filename
+
 
 class Visualization:
     """
     A class to generate plots for point clouds, persistence homology, and normalized Wasserstein distance.
 
+    Figures are rendered through matplotlib's object-oriented Agg API rather than pyplot,
+    so no global state is shared and the plot methods can be called from several threads.
+    Agg holds the GIL while it draws, though, so threads do not make rendering faster;
+    export_runs spreads large batches over worker processes instead.
+
     Attributes:
         point_cloud_counter (int): Counter for naming point cloud plot files.
         persistence_homology_counter (int): Counter for naming persistence homology plot files.
+        output_dir (str): Directory the plot files are written to.
+        max_workers (int or None): Size of the process pool export_runs renders in. None means one per CPU.
     """
 
-    def __init__(self):
+    def __init__(self, output_dir='.', max_workers=None):
         """
         Initialize the Visualization class with counters for plot files.
+
+        Args:
+            output_dir (str): Directory the plot files are written to.
+            max_workers (int or None): Size of the process pool export_runs renders in.
         """
         self.point_cloud_counter = 0
         self.persistence_homology_counter = 0
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self._counter_lock = threading.Lock()
+
+    def _next_point_cloud_filename(self, output_dir):
+        with self._counter_lock:
+            filename = os.path.join(output_dir, f'point_cloud_{self.point_cloud_counter}.png')
+            self.point_cloud_counter += 1
+        return filename
+
+    def _next_persistence_homology_filename(self, output_dir):
+        with self._counter_lock:
+            filename = os.path.join(output_dir, f'persistence_diagram_combined_{self.persistence_homology_counter}.png')
+            self.persistence_homology_counter += 1
+        return filename
 
-    def plot_point_cloud(self, point_cloud):
+    def plot_point_cloud(self, point_cloud, filename=None):
         """
         Plot and save a scatter plot of a point cloud.
 
         Args:
             point_cloud (np.ndarray): The point cloud data to be plotted.
+            filename (str, optional): Path of the plot. Defaults to the next numbered point_cloud file.
+
+        Returns:
+            str: The path of the saved plot.
         """
-        plt.figure()
-        plt.scatter(point_cloud[:, 0], point_cloud[:, 1])
-        plt.title("Point Cloud")
-        filename = f'point_cloud_{self.point_cloud_counter}.png'
-        plt.savefig(filename)
-        plt.close()
-        self.point_cloud_counter += 1
-
-    def plot_persistence_homology(self, persistence_data):
+        filename = filename or self._next_point_cloud_filename(self.output_dir)
+        return save_figure(point_cloud_figure, (point_cloud,), filename)
+
+    def plot_persistence_homology(self, persistence_data, filename=None):
         """
-        Plot and save a persistence diagram for homology groups H0 and H1.
+        Plot and save a persistence diagram for every homology group in the data.
 
         Args:
             persistence_data (list): Persistence diagrams for different homology dimensions.
+            filename (str, optional): Path of the plot. Defaults to the next numbered persistence_diagram_combined file.
+
+        Returns:
+            str: The path of the saved plot.
         """
-        plt.figure()
-        colors = ['b', 'r']
-        labels = ['H0', 'H1']
-
-        for dim, dgms in enumerate(persistence_data):
-            plt.scatter(dgms[:, 0], dgms[:, 1], c=colors[dim], label=labels[dim])
-
-        plt.title("Persistence Diagram (H0 and H1)")
-        plt.xlabel("Birth")
-        plt.ylabel("Death")
-        plt.legend()
-        filename = f'persistence_diagram_combined_{self.persistence_homology_counter}.png'
-        plt.savefig(filename)
-        plt.close()
-        self.persistence_homology_counter += 1
+        filename = filename or self._next_persistence_homology_filename(self.output_dir)
+        return save_figure(persistence_homology_figure, (persistence_data,), filename)
 
     def plot_normalized_wasserstein(self, wasserstein_dist, std_lifetimes1, std_lifetimes2):
         """
@@ -62,21 +192,79 @@ class Visualization:
             wasserstein_dist (float): The Wasserstein distance between two persistence diagrams.
             std_lifetimes1 (float): The standard deviation of lifetimes for the first persistence diagram.
             std_lifetimes2 (float): The standard deviation of lifetimes for the second persistence diagram.
+
+        Returns:
+            str: The path of the saved plot.
         """
+        self._print_wasserstein_summary(wasserstein_dist, std_lifetimes1, std_lifetimes2)
+        filename = os.path.join(self.output_dir, 'normalized_wasserstein.png')
+        return save_figure(normalized_wasserstein_figure, (wasserstein_dist, std_lifetimes1, std_lifetimes2), filename)
+
+    def _print_wasserstein_summary(self, wasserstein_dist, std_lifetimes1, std_lifetimes2):
         print("Wasserstein Distance:", wasserstein_dist)
         print("Standard Deviation of Lifetimes for Time Series 1:", std_lifetimes1)
         print("Standard Deviation of Lifetimes for Time Series 2:", std_lifetimes2)
 
-        normalized_wasserstein1 = wasserstein_dist / std_lifetimes1
-        normalized_wasserstein2 = wasserstein_dist / std_lifetimes2
+    def _run_jobs(self, embedding1, embedding2, diagrams1, diagrams2, wasserstein_dist, std_lifetimes1, std_lifetimes2, output_dir):
+        # Reserve filenames up front so numbering stays deterministic under concurrency
+        return [
+            (point_cloud_figure, (embedding1,), self._next_point_cloud_filename(output_dir)),
+            (point_cloud_figure, (embedding2,), self._next_point_cloud_filename(output_dir)),
+            (persistence_homology_figure, (diagrams1,), self._next_persistence_homology_filename(output_dir)),
+            (persistence_homology_figure, (diagrams2,), self._next_persistence_homology_filename(output_dir)),
+            (normalized_wasserstein_figure, (wasserstein_dist, std_lifetimes1, std_lifetimes2), os.path.join(output_dir, 'normalized_wasserstein.png')),
+        ]
+
+    def render_run(self, embedding1, embedding2, diagrams1, diagrams2, wasserstein_dist, std_lifetimes1, std_lifetimes2):
+        """
+        Render the five standard plots of one analysis run.
+
+        The plots are drawn one after another: they take well under a second together,
+        less than starting worker processes would cost.
+
+        Args:
+            embedding1 (np.ndarray): The first point cloud.
+            embedding2 (np.ndarray): The second point cloud.
+            diagrams1 (list): Persistence diagrams for the first point cloud.
+            diagrams2 (list): Persistence diagrams for the second point cloud.
+            wasserstein_dist (float): The Wasserstein distance between the two sets of diagrams.
+            std_lifetimes1 (float): The standard deviation of lifetimes for the first persistence diagram.
+            std_lifetimes2 (float): The standard deviation of lifetimes for the second persistence diagram.
+
+        Returns:
+            list: Paths of the saved plots, in the order point clouds, persistence diagrams, Wasserstein chart.
+        """
+        self._print_wasserstein_summary(wasserstein_dist, std_lifetimes1, std_lifetimes2)
+        jobs = self._run_jobs(embedding1, embedding2, diagrams1, diagrams2, wasserstein_dist, std_lifetimes1, std_lifetimes2, self.output_dir)
+        return [save_figure(*job) for job in jobs]
+
+    def export_runs(self, runs):
+        """
+        Render the plots of many analysis runs in one shared pool of worker processes.
+
+        Each run's plots are written to their own subdirectory of output_dir, using the
+        same filenames as a single run. Workers are spawned, as in pipeline.StageGraph, and
+        build each figure from the plotted arrays, so only the arrays and the file names
+        cross process boundaries.
+
+        Args:
+            runs (dict): Maps a run name to a dict of render_run keyword arguments.
+
+        Returns:
+            dict: Maps each run name to the paths of its saved plots.
+        """
+        jobs = []
+        for name, run in runs.items():
+            run_dir = os.path.join(self.output_dir, str(name))
+            os.makedirs(run_dir, exist_ok=True)
+            run_visualization = Visualization(run_dir)
+            for job in run_visualization._run_jobs(output_dir=run_dir, **run):
+                jobs.append((name, job))
 
-        plt.figure()
-        values = [normalized_wasserstein1, normalized_wasserstein2]
-        labels = ["Normalized Wasserstein (TS1)", "Normalized Wasserstein (TS2)"]
-        colors = ['b', 'g']
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            filenames = list(executor.map(save_figure, *zip(*[job for _, job in jobs])))
 
-        plt.bar(labels, values, color=colors)
-        plt.title("Normalized Wasserstein Distance")
-        plt.ylabel("Normalized Distance")
-        plt.savefig('normalized_wasserstein.png')
-        plt.close()
+        results = {name: [] for name in runs}
+        for (name, _), filename in zip(jobs, filenames):
+            results[name].append(filename)
+        return results
@@ -0,0 +1,69 @@
+import numpy as np
+import sys
+import os
+import unittest
+import warnings
+from scipy.spatial.distance import pdist
+
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from blocked_rips import BYTES_PER_EDGE, blocked_rips_persistence, condensed_distances, precision_check
+
+
+def noisy_circle(rng, n_points=150):
+    # Points around a unit circle, which has one prominent H1 feature
+    angles = rng.random(n_points) * 2 * np.pi
+    return np.column_stack([np.cos(angles), np.sin(angles)]) + 0.05 * rng.standard_normal((n_points, 2))
+
+
+# Class containing unittest test cases
+class TestBlockedRips(unittest.TestCase):
+    def setUp(self):
+        self.point_cloud = noisy_circle(np.random.default_rng(0))
+
+    # Test that tiled float32 distances match scipy's float64 ones, including partial edge tiles
+    def test_condensed_distances(self):
+        distances = condensed_distances(self.point_cloud.astype(np.float32), block_size=32)
+        self.assertEqual(distances.dtype, np.float32)
+        np.testing.assert_allclose(distances, pdist(self.point_cloud), rtol=1e-5, atol=1e-6)
+
+    # Test the documented accuracy check: float32 diagrams agree with float64 to float32 rounding
+    def test_precision_check(self):
+        errors = precision_check(self.point_cloud, block_size=32)
+        self.assertEqual(len(errors), 2)
+        self.assertTrue(all(error < 1e-5 for error in errors))
+
+    # Test that a budget too small for the dense path falls back to a truncated sparse graph
+    def test_sparse_fallback_under_tight_budget(self):
+        # Room for about a quarter of all edges, plus the tiles and histogram
+        n_pairs = len(self.point_cloud) * (len(self.point_cloud) - 1) // 2
+        memory_budget = BYTES_PER_EDGE * n_pairs // 4 + 2**16
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            diagrams = blocked_rips_persistence(self.point_cloud, memory_budget, block_size=32)
+        self.assertTrue(any("memory budget" in str(warning.message) for warning in caught))
+        self.assertEqual(len(diagrams[0]), len(self.point_cloud))
+        self.assertEqual(np.isinf(diagrams[0][:, 1]).sum(), 1)
+
+    # Test that without ripser's private extension the public sparse path gives the same diagrams
+    def test_missing_extension_falls_back(self):
+        expected = blocked_rips_persistence(self.point_cloud, 2**30, block_size=32)
+        saved = sys.modules.get('pyRipser')
+        sys.modules['pyRipser'] = None  # makes the import raise ImportError
+        try:
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                diagrams = blocked_rips_persistence(self.point_cloud, 2**30, block_size=32)
+        finally:
+            sys.modules['pyRipser'] = saved
+        self.assertTrue(any("compiled extension" in str(warning.message) for warning in caught))
+        for diagram, reference in zip(diagrams, expected):
+            np.testing.assert_allclose(diagram[np.lexsort(diagram.T[::-1])], reference[np.lexsort(reference.T[::-1])], atol=1e-6)
+
+    # Test that a budget too small even for the sparse graph is refused
+    def test_budget_too_small(self):
+        with self.assertRaises(ValueError):
+            blocked_rips_persistence(self.point_cloud, 1000, block_size=32)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import sys
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import cost_estimator
+from cost_estimator import CostEstimator
+
+# Class containing unittest test cases
+class TestCostEstimator(unittest.TestCase):
+    def setUp(self):
+        # Fixed coefficients keep the tests independent of the host
+        self.estimator = CostEstimator(time_models={1: (1e-7, 2.0)}, bytes_per_pair=32.0)
+
+    # Test that the embedding shrinks the point count by (dimension - 1) * lag
+    def test_estimate_point_count(self):
+        estimate = self.estimator.estimate(1000, 3, 10)
+        self.assertEqual(estimate.n_points, 980)
+        self.assertGreater(estimate.seconds, 0)
+        self.assertGreater(estimate.peak_bytes, 32.0 * 980 ** 2)
+
+    # Test that a small series is admitted as-is
+    def test_admit_run(self):
+        decision = self.estimator.admit(1000, 2, 1, memory_budget=2**30)
+        self.assertEqual(decision.action, 'run')
+        self.assertIsNone(decision.n_samples)
+
+    # Test that a series over the memory budget is switched to subsampling within the budget
+    def test_admit_subsample(self):
+        memory_budget = 100 * 2**20
+        decision = self.estimator.admit(100000, 2, 1, memory_budget=memory_budget)
+        self.assertEqual(decision.action, 'subsample')
+        self.assertLessEqual(self.estimator.estimate(decision.n_samples + 1, 2, 1).peak_bytes, memory_budget)
+
+    # Test that a series that cannot fit the budget even when subsampled is rejected
+    def test_admit_reject(self):
+        decision = self.estimator.admit(100000, 2, 1, memory_budget=1000)
+        self.assertEqual(decision.action, 'reject')
+
+    # Test that the float32 path is never subsampled for memory, only warned about dropped edges
+    def test_admit_float32_memory(self):
+        decision = self.estimator.admit(100000, 2, 1, memory_budget=100 * 2**20, time_budget=1e9, precision='float32')
+        self.assertIn(decision.action, ('run', 'warn'))
+        self.assertIn("Long edges", decision.message)
+
+    # Test that a saved calibration loads back unchanged, and that a file from an older benchmark is not used
+    def test_load_saved_calibration(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'calibration.json')
+            self.estimator.save(path)
+            loaded = CostEstimator.load_or_calibrate(path)
+            self.assertEqual(loaded.time_models[1], (1e-7, 2.0))
+            self.assertEqual(loaded.bytes_per_pair, 32.0)
+
+            with open(path, 'w') as file:
+                file.write('{"time_models": {"1": [1e-7, 2.0]}, "bytes_per_pair": 32.0}')
+            with mock.patch.object(CostEstimator, 'calibrate') as calibrate:
+                self.assertEqual(CostEstimator.load_or_calibrate(path).bytes_per_pair, CostEstimator.DEFAULT_BYTES_PER_PAIR)
+            calibrate.assert_called_once()
+
+    # Test that the memory benchmark sees ripser's native buffers, which tracemalloc missed (about 30 bytes per pair)
+    @unittest.skipIf(cost_estimator.resource is None, "resource module unavailable")
+    def test_calibrate_memory(self):
+        estimator = CostEstimator()
+        estimator.calibrate(sizes=(50, 100), maxdims=(0,))
+        self.assertGreater(estimator.bytes_per_pair, 50.0)
+        self.assertLess(estimator.bytes_per_pair, 150.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,7 +6,7 @@ from gtda.time_series import SingleTakensEmbedding
 
 # Add the 'src' directory to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
-from delay_embedder import DelayEmbedding
+from delay_embedder import DelayEmbedding, IncrementalDelayEmbedding
 
 class TestDelayEmbedding(unittest.TestCase):
     def setUp(self):
@@ -35,5 +35,19 @@ class TestDelayEmbedding(unittest.TestCase):
         expected_embedding = np.array([[1, 2], [2, 3], [3, 4], [4, 5], [5, 6], [6, 7], [7, 8], [8, 9], [9, 10], [10, 11], [11, 12], [12, 13], [13, 14], [14, 15], [15, 16]])
         np.testing.assert_array_equal(embedding, expected_embedding, "The embedding values are incorrect")
 
+    def test_generate_strided_embedding_matches(self):
+        # Test if the strided embedding reproduces the giotto-tda embedding exactly
+        expected = self.emb.generate_embedding()
+        strided = DelayEmbedding(self.timeseries, self.dimension, self.lag).generate_strided_embedding()
+        np.testing.assert_array_equal(strided, expected, "The strided embedding values are incorrect")
+
+    def test_incremental_embedding_matches(self):
+        # Test if extending in chunks (past the initial buffer capacity) gives the same points as embedding once
+        incremental = IncrementalDelayEmbedding(self.dimension, self.lag, capacity=4)
+        new_points = [incremental.extend(chunk) for chunk in np.split(self.timeseries, [1, 3, 9])]
+        self.assertEqual(new_points, [0, 1, 6, 5])
+        expected = DelayEmbedding(self.timeseries, self.dimension, self.lag).generate_strided_embedding()
+        np.testing.assert_array_equal(incremental.generate_strided_embedding(), expected, "The incremental embedding values are incorrect")
+
 if __name__ == '__main__':
     unittest.main()
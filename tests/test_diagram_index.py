@@ -0,0 +1,95 @@
+import numpy as np
+import persim
+import sys
+import os
+import unittest
+
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from diagram_index import DiagramIndex, exact_wasserstein, flatten_diagrams, wasserstein_lower_bound
+
+
+def random_diagrams(rng, n_points=20):
+    # Build an H0/H1 pair of diagrams with deaths strictly above births
+    diagrams = []
+    for _ in range(2):
+        births = rng.random(n_points)
+        deaths = births + rng.random(n_points)
+        diagrams.append(np.column_stack([births, deaths]))
+    diagrams[0][-1, 1] = np.inf
+    return diagrams
+
+
+# Class containing unittest test cases
+class TestDiagramIndex(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.stored = [random_diagrams(self.rng) for _ in range(50)]
+        self.index = DiagramIndex()
+        for i, diagrams in enumerate(self.stored):
+            self.index.add(diagrams, key=f"series_{i}")
+
+    # Test that the lower bound never exceeds the exact Wasserstein distance
+    def test_lower_bound_is_valid(self):
+        for _ in range(20):
+            diagrams1 = random_diagrams(self.rng, n_points=15)
+            diagrams2 = random_diagrams(self.rng, n_points=25)
+            bound = wasserstein_lower_bound(diagrams1, diagrams2)
+            self.assertLessEqual(bound, exact_wasserstein(diagrams1, diagrams2) + 1e-9)
+
+    # Test that the exact distance is the one persim computes
+    def test_exact_matches_persim(self):
+        for _ in range(10):
+            diagrams1 = random_diagrams(self.rng, n_points=15)
+            diagrams2 = random_diagrams(self.rng, n_points=25)
+            expected = persim.wasserstein(flatten_diagrams(diagrams1), flatten_diagrams(diagrams2))
+            self.assertAlmostEqual(exact_wasserstein(diagrams1, diagrams2), expected)
+
+    # Test that a stored diagram set is its own nearest neighbor
+    def test_query_returns_stored_item_first(self):
+        matches = self.index.query(self.stored[7], k=3)
+        self.assertEqual(len(matches), 3)
+        self.assertEqual(matches[0][0], "series_7")
+        self.assertAlmostEqual(matches[0][1], 0.0)
+        distances = [distance for _, distance in matches]
+        self.assertEqual(distances, sorted(distances))
+
+    # Test that the L1 distance between features never exceeds the exact Wasserstein distance
+    def test_feature_bound_is_valid(self):
+        for _ in range(20):
+            diagrams1 = random_diagrams(self.rng, n_points=15)
+            diagrams2 = random_diagrams(self.rng, n_points=25)
+            bound = np.abs(self.index.vectorize(diagrams1) - self.index.vectorize(diagrams2)).sum()
+            self.assertLessEqual(bound, exact_wasserstein(diagrams1, diagrams2) + 1e-9)
+
+    # Test that queries return exactly the brute-force nearest neighbors
+    def test_query_matches_brute_force(self):
+        index = DiagramIndex()
+        stored = [random_diagrams(self.rng, n_points=int(self.rng.integers(5, 30))) for _ in range(300)]
+        for i, diagrams in enumerate(stored):
+            index.add(diagrams, key=i)
+        for _ in range(5):
+            query = random_diagrams(self.rng, n_points=20)
+            brute_force = sorted(persim.wasserstein(flatten_diagrams(query), flatten_diagrams(diagrams)) for diagrams in stored)[:5]
+            distances = [distance for _, distance in index.query(query, k=5)]
+            np.testing.assert_allclose(distances, brute_force)
+
+    # Test that series resembling a few prototypes are found without comparing against the whole store
+    def test_query_prunes_clustered_store(self):
+        index = DiagramIndex()
+        prototypes = [random_diagrams(self.rng, n_points=int(self.rng.integers(5, 30))) for _ in range(20)]
+        for i in range(1000):
+            index.add([dgm + 0.01 * self.rng.random(dgm.shape) for dgm in prototypes[i % 20]], key=i)
+        matches = index.query(prototypes[3], k=5)
+        self.assertTrue(all(key % 20 == 3 for key, _ in matches))
+        self.assertLess(index.exact_computations, 100)
+
+    # Test that vectorization produces fixed-length features regardless of diagram size
+    def test_vectorize_fixed_length(self):
+        self.index.build()
+        small = self.index.vectorize(random_diagrams(self.rng, n_points=2))
+        large = self.index.vectorize(random_diagrams(self.rng, n_points=200))
+        self.assertEqual(small.shape, large.shape)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import numpy as np
+import sys
+import os
+import tempfile
+import unittest
+
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from follower import CSVTail, FollowAnalysis
+
+
+def append(path, text):
+    with open(path, 'a') as file:
+        file.write(text)
+
+
+def rows_text(start, stop):
+    # Rows of a sine wave, one per timestep
+    return "".join(f"{t},{np.sin(0.3 * t):.6f}\n" for t in range(start, stop))
+
+
+# Class containing unittest test cases
+class TestCSVTail(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'log.csv')
+        append(self.path, "time,value\n1,10\n2,20\n")
+        self.tail = CSVTail(self.path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    # Test that the header is skipped and only appended lines are returned on later reads
+    def test_reads_only_new_rows(self):
+        rows, restarted = self.tail.read_rows()
+        np.testing.assert_array_equal(rows, [[1, 10], [2, 20]])
+        self.assertFalse(restarted)
+        append(self.path, "3,30\n")
+        rows, _ = self.tail.read_rows()
+        np.testing.assert_array_equal(rows, [[3, 30]])
+        self.assertEqual(len(self.tail.read_rows()[0]), 0)
+
+    # Test that a line still being written is held back until its newline arrives
+    def test_partial_line_held_back(self):
+        self.tail.read_rows()
+        append(self.path, "3,3")
+        self.assertEqual(len(self.tail.read_rows()[0]), 0)
+        append(self.path, "0\n")
+        np.testing.assert_array_equal(self.tail.read_rows()[0], [[3, 30]])
+
+    # Test that malformed lines are counted and skipped without losing good ones
+    def test_malformed_lines_skipped(self):
+        self.tail.read_rows()
+        append(self.path, "3,30\noops\n4,40,1\n5,50\n")
+        np.testing.assert_array_equal(self.tail.read_rows()[0], [[3, 30], [5, 50]])
+        self.assertEqual(self.tail.skipped_lines, 2)
+        # Lines with a missing field parse as NaN in pandas, but are malformed all the same
+        append(self.path, "6,60\n2\n3,\n7,nan\n8,80\n")
+        np.testing.assert_array_equal(self.tail.read_rows()[0], [[6, 60], [8, 80]])
+        self.assertEqual(self.tail.skipped_lines, 5)
+
+    # Test that a truncated file is read again from the start
+    def test_truncation_restarts(self):
+        self.tail.read_rows()
+        with open(self.path, 'w') as file:
+            file.write("7,70\n")
+        rows, restarted = self.tail.read_rows()
+        self.assertTrue(restarted)
+        np.testing.assert_array_equal(rows, [[7, 70]])
+
+
+class TestFollowAnalysis(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.paths = [os.path.join(self.tmpdir.name, f'log{i}.csv') for i in (1, 2)]
+        for path in self.paths:
+            append(path, rows_text(0, 200))
+        self.now = 0.0
+        self.follow = FollowAnalysis(self.paths, 2, 3, mode='sublevel', interval=60, change_threshold=0.1,
+                                     clock=lambda: self.now)
+        self.messages = []
+
+    def tearDown(self):
+        self.follow.close()
+        self.tmpdir.cleanup()
+
+    # Test that updates run first on enough data, then only on enough growth or after the interval
+    def test_update_schedule(self):
+        summary = self.follow.poll(report=self.messages.append)
+        self.assertEqual(summary['update'], 1)
+        self.assertEqual(summary['samples'], [200, 200])
+
+        # 5% growth is below the change threshold and the interval has not passed
+        append(self.paths[0], rows_text(200, 210))
+        self.assertIsNone(self.follow.poll(report=self.messages.append))
+
+        # 10% more growth crosses it; the summary counts every sample since the last one
+        append(self.paths[0], rows_text(210, 230))
+        summary = self.follow.poll(report=self.messages.append)
+        self.assertEqual(summary['update'], 2)
+        self.assertEqual(summary['new_samples'], [30, 0])
+
+        # No new data: nothing to do, however long it has been
+        self.now = 1000.0
+        self.assertIsNone(self.follow.poll(report=self.messages.append))
+
+        # Any new data once the interval has passed
+        append(self.paths[1], rows_text(200, 201))
+        self.assertEqual(self.follow.poll(report=self.messages.append)['update'], 3)
+        self.assertTrue(self.messages[-1].startswith("Update 3:"))
+
+    # Test that the incrementally extended series matches the whole file
+    def test_incremental_series_matches_file(self):
+        self.follow.poll(report=self.messages.append)
+        append(self.paths[0], rows_text(200, 250))
+        self.follow.poll(report=self.messages.append)
+        expected = np.sin(0.3 * np.arange(250))
+        np.testing.assert_allclose(self.follow.embeddings[0].timeseries, expected, atol=1e-6)
+
+    # Test that every update runs in the same process pool, and close() shuts it down
+    def test_process_pool_reused(self):
+        self.follow.poll(report=self.messages.append)
+        process_pool = self.follow._process_pool
+        append(self.paths[0], rows_text(200, 250))
+        self.assertEqual(self.follow.poll(report=self.messages.append)['update'], 2)
+        self.assertIs(self.follow._process_pool, process_pool)
+        self.follow.close()
+        self.assertIsNone(self.follow._process_pool)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -22,6 +22,23 @@ class TestPersistenceAnalysis(unittest.TestCase):
         self.assertTrue(isinstance(diagrams1, list) and len(diagrams1) > 0)
         self.assertTrue(isinstance(diagrams2, list) and len(diagrams2) > 0)
 
+    # Test approximate persistence homology method for ability to produce output from a subsample
+    def test_generate_approximate_persistence_homology(self):
+        diagrams = self.analysis.generate_approximate_persistence_homology(self.point_cloud1, n_samples=50)
+        self.assertTrue(isinstance(diagrams, list) and len(diagrams) > 0)
+        self.assertEqual(len(diagrams[0]), 50)
+
+    # Test sublevel-set persistence against a hand-computed diagram and the downstream methods
+    def test_generate_sublevel_persistence(self):
+        # Minima 0 (global), 1 and 2; the basin of 2 merges at 3, the basin of 1 at 4
+        timeseries = np.array([0, 4, 1, 3, 2, 5])
+        diagrams = self.analysis.generate_sublevel_persistence(timeseries)
+        self.assertEqual(len(diagrams), 1)
+        pairs = sorted(map(tuple, diagrams[0].tolist()))
+        self.assertEqual(pairs, [(0.0, float('inf')), (1.0, 4.0), (2.0, 3.0)])
+        self.assertIsInstance(self.analysis.compute_wasserstein_distance(diagrams, diagrams), float)
+        self.assertIsInstance(self.analysis.compute_std_lifetimes(diagrams), float)
+
     # Test Wasserstein distance calculator for ability to produce float output
     def test_compute_wasserstein_distance(self):
         diagrams1 = self.analysis.generate_persistence_homology(self.point_cloud1)
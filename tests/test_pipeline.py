@@ -0,0 +1,112 @@
+import sys
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from concurrent.futures import ProcessPoolExecutor
+
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from cost_estimator import CostEstimator
+from pipeline import PLOT_STAGES, PipelineAbort, StageGraph, build_analysis_graph
+from preprocessor import Preprocessing
+from visualizer import Visualization
+
+SAMPLE_FILE1 = os.path.join(os.path.dirname(__file__), '..', 'sample_wind.csv')
+SAMPLE_FILE2 = os.path.join(os.path.dirname(__file__), '..', 'sample_wind2.csv')
+
+
+def add(a, b):
+    return a + b
+
+
+# Class containing unittest test cases
+class TestStageGraph(unittest.TestCase):
+    # Test that stages receive their dependencies' results and run in dependency order
+    def test_results_flow_through_dependencies(self):
+        graph = StageGraph()
+        graph.add_stage('a', lambda: 1)
+        graph.add_stage('b', lambda: 2)
+        graph.add_stage('c', add, deps=('a', 'b'), in_process=True)
+        graph.add_stage('d', lambda c: c * 10, deps=('c',))
+        self.assertEqual(graph.run(report=lambda message: None), {'a': 1, 'b': 2, 'c': 3, 'd': 30})
+
+    # Test that independent stages overlap rather than running one after another
+    def test_independent_stages_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+        graph = StageGraph()
+        graph.add_stage('left', barrier.wait)
+        graph.add_stage('right', barrier.wait)
+        graph.run(report=lambda message: None)
+
+    # Test that a failing stage stops the graph and its exception reaches the caller
+    def test_stage_failure_propagates(self):
+        def fail():
+            raise PipelineAbort("stop")
+        graph = StageGraph()
+        graph.add_stage('fail', fail)
+        graph.add_stage('after', lambda result: result, deps=('fail',))
+        with self.assertRaises(PipelineAbort):
+            graph.run(report=lambda message: None)
+
+    # Test that an abort terminates running process stages rather than waiting for them
+    def test_stage_failure_terminates_process_stages(self):
+        def fail():
+            time.sleep(2)
+            raise PipelineAbort("stop")
+        graph = StageGraph()
+        graph.add_stage('duration', lambda: 60)
+        graph.add_stage('slow', time.sleep, deps=('duration',), in_process=True)
+        graph.add_stage('fail', fail)
+        start = time.perf_counter()
+        with self.assertRaises(PipelineAbort):
+            graph.run(report=lambda message: None)
+        self.assertLess(time.perf_counter() - start, 30)
+
+    # Test that a process pool passed in runs the process stages and is left running for the next graph
+    def test_shared_process_pool(self):
+        with ProcessPoolExecutor(max_workers=1) as process_pool:
+            for value in (1, 2):
+                graph = StageGraph(process_pool=process_pool)
+                graph.add_stage('a', lambda value=value: value)
+                graph.add_stage('b', add, deps=('a', 'a'), in_process=True)
+                self.assertEqual(graph.run(report=lambda message: None)['b'], 2 * value)
+
+    # Test that stages can only depend on stages that already exist
+    def test_unknown_dependency(self):
+        graph = StageGraph()
+        with self.assertRaises(ValueError):
+            graph.add_stage('a', lambda x: x, deps=('missing',))
+
+
+class TestAnalysisGraph(unittest.TestCase):
+    # Test the full analysis graph end to end on the sample data (sublevel mode keeps it fast)
+    def test_build_analysis_graph_sublevel(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            graph = build_analysis_graph(SAMPLE_FILE1, SAMPLE_FILE2, 2, 15, Preprocessing(), mode='sublevel',
+                                         visualization=Visualization(output_dir=tmpdir))
+            results = graph.run(report=lambda message: None)
+            self.assertIsInstance(results['compare']['wasserstein_dist'], float)
+            self.assertTrue(all(os.path.exists(results[name]) for name in PLOT_STAGES))
+
+    # Test that in sublevel mode a series too short to embed only loses its point cloud plot
+    def test_sublevel_without_embedding(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            graph = build_analysis_graph(SAMPLE_FILE1, SAMPLE_FILE2, 2, 10**7, Preprocessing(), mode='sublevel',
+                                         visualization=Visualization(output_dir=tmpdir))
+            results = graph.run(report=lambda message: None)
+            self.assertIsNone(results['plot_cloud1'])
+            self.assertIsInstance(results['compare']['wasserstein_dist'], float)
+            self.assertTrue(os.path.exists(results['plot_wasserstein']))
+
+    # Test that the cost model is loaded or calibrated before any stage runs, never alongside the load stages
+    def test_estimator_resolved_before_run(self):
+        with mock.patch.object(CostEstimator, 'load_or_calibrate', return_value=CostEstimator()) as load_or_calibrate:
+            graph = build_analysis_graph(SAMPLE_FILE1, SAMPLE_FILE2, 2, 15, Preprocessing())
+        load_or_calibrate.assert_called_once_with()
+        self.assertEqual(graph.stages['admit1'][1], ('load1',))
+
+if __name__ == "__main__":
+    unittest.main()
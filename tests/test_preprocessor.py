@@ -0,0 +1,61 @@
+import numpy as np
+import sys
+import os
+import unittest
+
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from preprocessor import Preprocessing
+
+# Class containing unittest test cases
+class TestPreprocessing(unittest.TestCase):
+    def setUp(self):
+        self.timesteps = np.arange(1000, dtype=float)
+        self.values = np.sin(self.timesteps / 10.0) + 0.01 * self.timesteps
+
+    # Test that the default stage leaves regularly sampled data untouched
+    def test_default_is_identity_for_regular_data(self):
+        timesteps, values = Preprocessing().process(self.timesteps, self.values)
+        np.testing.assert_array_equal(timesteps, self.timesteps)
+        np.testing.assert_array_equal(values, self.values)
+
+    # Test that uneven timesteps are interpolated onto a regular grid
+    def test_resample_uneven_timesteps(self):
+        uneven = np.delete(self.timesteps, [10, 11, 500])
+        timesteps, values = Preprocessing().process(uneven, np.interp(uneven, self.timesteps, self.values))
+        np.testing.assert_allclose(np.diff(timesteps), 1.0)
+        self.assertEqual(len(timesteps), len(values))
+
+    # Test that decimation shrinks the series to the target rate
+    def test_decimate_to_target_rate(self):
+        timesteps, values = Preprocessing(target_rate=0.25).process(self.timesteps, self.values)
+        self.assertEqual(len(values), 250)
+        np.testing.assert_allclose(np.diff(timesteps), 4.0)
+
+    # Test that a target rate between two integer factors is never exceeded
+    def test_decimate_rounds_factor_up(self):
+        timesteps, values = Preprocessing(target_rate=0.4).process(self.timesteps, self.values)
+        self.assertLessEqual(1.0 / (timesteps[1] - timesteps[0]), 0.4)
+        self.assertEqual(len(values), len(timesteps))
+
+    # Test that decimation does not ring at the ends of the series
+    def test_decimate_no_edge_artefacts(self):
+        preprocessing = Preprocessing(target_rate=0.25)
+        _, values = preprocessing.process(self.timesteps, np.full(1000, 5.0))
+        np.testing.assert_allclose(values, 5.0)
+        _, values = preprocessing.process(self.timesteps, 0.01 * self.timesteps)
+        np.testing.assert_allclose(values, 0.01 * self.timesteps[::4], atol=1e-9)
+
+    # Test that detrending and z-score normalization produce a centered, unit-variance signal
+    def test_detrend_and_normalize(self):
+        _, values = Preprocessing(detrend='linear', normalize='zscore').process(self.timesteps, self.values)
+        self.assertAlmostEqual(values.mean(), 0.0)
+        self.assertAlmostEqual(values.std(), 1.0)
+
+    # Test that unknown options are rejected
+    def test_invalid_option(self):
+        with self.assertRaises(ValueError):
+            Preprocessing(detrend='quadratic')
+
+if __name__ == "__main__":
+    unittest.main()
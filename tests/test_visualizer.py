@@ -0,0 +1,48 @@
+import numpy as np
+import sys
+import os
+import tempfile
+import unittest
+
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from visualizer import Visualization, persistence_homology_figure
+
+# Class containing unittest test cases
+class TestVisualization(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.visualization = Visualization(output_dir=self.tmpdir.name)
+        self.embedding = np.random.random((50, 2))
+        # Three homology dimensions, with an infinite death in H0
+        self.diagrams = [np.array([[0.0, 0.2], [0.0, np.inf]]), np.array([[0.1, 0.3]]), np.array([[0.2, 0.25]])]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    # Test persistence diagram builder for any number of homology dimensions and infinite deaths
+    def test_persistence_homology_figure_all_dimensions(self):
+        fig = persistence_homology_figure(self.diagrams)
+        labels = fig.axes[0].get_legend_handles_labels()[1]
+        self.assertEqual(labels, ["H0", "H1", "H2", "∞"])
+
+    # Test render_run for ability to write the five standard plots with the usual filenames
+    def test_render_run(self):
+        files = self.visualization.render_run(self.embedding, self.embedding, self.diagrams, self.diagrams, 1.0, 0.5, 0.5)
+        names = [os.path.basename(f) for f in files]
+        self.assertEqual(names, ['point_cloud_0.png', 'point_cloud_1.png', 'persistence_diagram_combined_0.png',
+                                 'persistence_diagram_combined_1.png', 'normalized_wasserstein.png'])
+        self.assertTrue(all(os.path.exists(f) for f in files))
+
+    # Test export_runs for ability to batch several runs into separate directories
+    def test_export_runs(self):
+        run = dict(embedding1=self.embedding, embedding2=self.embedding, diagrams1=self.diagrams, diagrams2=self.diagrams,
+                   wasserstein_dist=1.0, std_lifetimes1=0.5, std_lifetimes2=0.5)
+        results = self.visualization.export_runs({'a': run, 'b': run})
+        self.assertEqual(set(results), {'a', 'b'})
+        for name, files in results.items():
+            self.assertEqual(len(files), 5)
+            self.assertTrue(all(os.path.dirname(f).endswith(name) and os.path.exists(f) for f in files))
+
+if __name__ == "__main__":
+    unittest.main()